@@ -1,9 +1,77 @@
+from typing import Any, Dict
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     PROVIDER: str = "test"
     
+    # How long a new booking holds its slot before it expires
+    BOOKING_HOLD_MINUTES: int = 10
+    
+    # Database file and connection pool for PROVIDER="sqlite"
+    SQLITE_PATH: str = "data/calendar.db"
+    SQLITE_POOL_SIZE: int = 4
+    
+    # Read-through cache in front of the provider; PROVIDER_CACHE_TTLS overrides
+    # per-method TTLs in seconds, e.g. {"get_all_services": 600, "get_client": 0}
+    PROVIDER_CACHE_ENABLED: bool = False
+    PROVIDER_CACHE_MAX_ENTRIES: int = 1024
+    PROVIDER_CACHE_TTLS: Dict[str, float] = {}
+    
+    # Per-tenant providers, chosen by the tenant header or a /tenants/<id> path prefix.
+    # Requests without a tenant use PROVIDER. Example:
+    # {"brand_a": {"provider": "sqlite", "sqlite_path": "data/brand_a.db", "cache": true}}
+    TENANT_HEADER: str = "X-Tenant-ID"
+    TENANT_PROVIDERS: Dict[str, Dict[str, Any]] = {}
+    TENANT_MAX_PROVIDERS: int = 16
+    TENANT_IDLE_TIMEOUT: float = 600.0
+    
+    # Zenoti API (PROVIDER="zenoti"); ZENOTI_BASE_URL can point at a local mock server.
+    # ZENOTI_RATE_LIMIT is requests per second, with bursts of up to ZENOTI_RATE_BURST.
+    ZENOTI_BASE_URL: str = "https://api.zenoti.com/v1"
+    ZENOTI_API_KEY: str = ""
+    ZENOTI_CENTER_ID: str = ""
+    ZENOTI_TIMEOUT: float = 10.0
+    ZENOTI_MAX_CONNECTIONS: int = 20
+    ZENOTI_RETRIES: int = 2
+    ZENOTI_RATE_LIMIT: float = 10.0
+    ZENOTI_RATE_BURST: int = 20
+    # Longest a call may queue for a rate-limit token before failing instead
+    ZENOTI_RATE_MAX_WAIT: float = 10.0
+    ZENOTI_PAGE_SIZE: int = 100
+    # Bounds on one slot search: upstream calls in flight, days and explicitly requested therapists
+    ZENOTI_MAX_CONCURRENCY: int = 8
+    ZENOTI_MAX_SEARCH_DAYS: int = 14
+    ZENOTI_MAX_SEARCH_THERAPISTS: int = 5
+    
+    # mangomint upstream HTTP client
+    MANGOMINT_BASE_URL: str = "https://booking.mangomint.com"
+    # Company served under /cityglow_florida (City Glow Florida)
+    MANGOMINT_COMPANY_ID: str = "722905"
+    MANGOMINT_TIMEOUT: float = 10.0
+    MANGOMINT_MAX_CONNECTIONS: int = 10
+    MANGOMINT_RETRIES: int = 2
+    
+    # City Glow Florida catalog refresh (seconds)
+    CITYGLOW_REFRESH_ENABLED: bool = True
+    CITYGLOW_REFRESH_INTERVAL: float = 300.0
+    CITYGLOW_REFRESH_JITTER: float = 0.1
+    CITYGLOW_REFRESH_RETRY_DELAY: float = 5.0
+    CITYGLOW_REFRESH_MAX_BACKOFF: float = 300.0
+    CITYGLOW_REFRESH_MIN_INTERVAL: float = 10.0
+    
+    # Last good startup payload, used to serve immediately after a restart
+    CITYGLOW_SNAPSHOT_PATH: str = "data/cityglow_snapshot.json"
+    
+    # Other mangomint companies served under /mangomint/<company_id>, with optional
+    # per-company "refresh_interval" (seconds) and "snapshot_path", e.g.
+    # {"123456": {"refresh_interval": 900}}
+    MANGOMINT_COMPANIES: Dict[str, Dict[str, Any]] = {}
+    MANGOMINT_SNAPSHOT_DIR: str = "data/mangomint"
+    # Estimated memory all loaded company catalogs may use before the least
+    # recently used ones are unloaded (they reload from disk on demand)
+    MANGOMINT_MEMORY_BUDGET_MB: float = 256.0
+
     class Config:
         env_file = ".env"
 
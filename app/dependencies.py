@@ -1,20 +1,26 @@
-from app.providers.test_provider import TestProvider
+from typing import AsyncIterator
+from fastapi import Depends, HTTPException, Request
 from app.providers.base import BaseProvider
+from app.providers.registry import DEFAULT_TENANT, ProviderRegistry
 from app.config import settings
 
-# Global provider instances to persist state
-_test_provider_instance = None
+# Provider instances persist state across requests, one per tenant
+provider_registry = ProviderRegistry(
+    {DEFAULT_TENANT: {}, **settings.TENANT_PROVIDERS},
+    max_providers=settings.TENANT_MAX_PROVIDERS,
+    idle_timeout=settings.TENANT_IDLE_TIMEOUT
+)
 
 
-def get_provider() -> BaseProvider:
-    """Get the appropriate provider based on config"""
-    global _test_provider_instance
-    
-    if settings.PROVIDER == "test":
-        if _test_provider_instance is None:
-            _test_provider_instance = TestProvider()
-        return _test_provider_instance
-    # elif settings.PROVIDER == "zenoti":
-    #     return ZenotiProvider()
-    else:
-        raise ValueError(f"Unknown provider: {settings.PROVIDER}") 
\ No newline at end of file
+def get_tenant_id(request: Request) -> str:
+    """Get the request's tenant from the /tenants/<id> path prefix or the tenant header"""
+    tenant_id = getattr(request.state, "tenant_id", None) or request.headers.get(settings.TENANT_HEADER) or DEFAULT_TENANT
+    if tenant_id not in provider_registry:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    return tenant_id
+
+
+async def get_provider(tenant_id: str = Depends(get_tenant_id)) -> AsyncIterator[BaseProvider]:
+    """Get the appropriate provider for the request's tenant"""
+    async with provider_registry.lease(tenant_id) as provider:
+        yield provider
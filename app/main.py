@@ -1,13 +1,34 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.responses import HTMLResponse
+from app.config import settings
+from app.dependencies import get_provider, provider_registry
+from app.providers.base import BaseProvider
+from app.providers.caching_provider import CachingProvider
 from app.routers import clients, services, centers, employees, slots, bookings, cityglow_florida
+from app.services.cityglow_service import catalogs, mangomint_client
+from app.utils.tenancy import TenantPathMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.CITYGLOW_REFRESH_ENABLED:
+        catalogs.start_background_refresh()
+    yield
+    await catalogs.stop_background_refresh()
+    await mangomint_client.aclose()
+    await provider_registry.close_all()
+
 
 app = FastAPI(
     title="MedSpa Booking API",
     description="API for managing MedSpa appointments and City Glow Florida services",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(TenantPathMiddleware)
+
 API_PREFIX = "/api/v1"
 
 # Existing calendar app routes
@@ -18,11 +39,26 @@ app.include_router(employees.router, prefix=f"{API_PREFIX}/employees", tags=["em
 app.include_router(slots.router, prefix=f"{API_PREFIX}/slots", tags=["slots"])
 app.include_router(bookings.router, prefix=f"{API_PREFIX}/bookings", tags=["bookings"])
 
-# City Glow Florida routes
+# City Glow Florida routes, and the same catalog API for any configured mangomint company
 app.include_router(cityglow_florida.router, prefix=f"{API_PREFIX}/cityglow_florida", tags=["cityglow_florida"])
+app.include_router(cityglow_florida.router, prefix=f"{API_PREFIX}/mangomint/{{company_id}}", tags=["mangomint"])
 
 @app.get("/")
 async def root():
     return {
         "status": "ok",
     }
+
+
+@app.get(f"{API_PREFIX}/provider/cache")
+async def provider_cache_stats(provider: BaseProvider = Depends(get_provider)):
+    """Get the provider read cache's size and per-method hit/miss counters"""
+    if not isinstance(provider, CachingProvider):
+        return {"enabled": False}
+    return {"enabled": True, **provider.cache_stats()}
+
+
+@app.get(f"{API_PREFIX}/provider/registry")
+async def provider_registry_stats():
+    """Get the live per-tenant provider instances"""
+    return provider_registry.stats()
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+from typing import List, Union
+
+
+class ServiceBatchRequest(BaseModel):
+    services: List[Union[int, str]] = Field(..., min_length=1, max_length=200)
@@ -0,0 +1,139 @@
+from datetime import date, time
+from typing import Any, Dict, Iterator, List, Tuple
+from app.models.slot import Slot
+
+MINUTES_PER_DAY = 24 * 60
+
+# Slots are offered on this grid (minutes past midnight)
+SLOT_INTERVAL = 15
+
+SLOT_GRID_MASK = sum(1 << minute for minute in range(0, MINUTES_PER_DAY, SLOT_INTERVAL))
+
+# Weekday (0 = Monday) -> list of (start_minute, end_minute) working intervals
+WeeklyHours = Dict[int, List[Tuple[int, int]]]
+
+DEFAULT_WORKING_HOURS: WeeklyHours = {weekday: [(9 * 60, 17 * 60)] for weekday in range(6)}
+
+
+def interval_mask(start_minute: int, end_minute: int) -> int:
+    """Bitmap with bits [start_minute, end_minute) set"""
+    start_minute = max(0, start_minute)
+    end_minute = min(MINUTES_PER_DAY, end_minute)
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def run_starts(free_mask: int, duration: int) -> int:
+    """Bitmap of minutes that begin a free run of at least `duration` minutes
+    
+    Works on the whole day at once: each step ANDs the mask with a shifted
+    copy of itself, doubling the run length covered, so a duration costs
+    O(log duration) big-integer operations instead of a per-minute scan.
+    """
+    if duration <= 0:
+        return free_mask
+    run = free_mask
+    span = 1
+    while span < duration and run:
+        step = min(span, duration - span)
+        run &= run >> step
+        span += step
+    return run
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of set bits, lowest first"""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def minute_to_time(minute: int) -> time:
+    return time(minute // 60, minute % 60)
+
+
+def time_to_minute(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def encode_slot_id(employee_id: str, day: date, start_minute: int) -> str:
+    return f"{employee_id}_{day.isoformat()}_{start_minute}"
+
+
+def parse_slot_id(slot_id: str) -> Tuple[str, date, int]:
+    """Split a slot ID into (employee_id, day, start_minute); raises ValueError if malformed"""
+    employee_id, day, start_minute = slot_id.rsplit("_", 2)
+    return employee_id, date.fromisoformat(day), int(start_minute)
+
+
+class AvailabilityEngine:
+    """Per-employee availability as per-day minute bitmaps
+    
+    Working hours are compiled once into seven weekday masks per employee,
+    and booked time is kept as one busy mask per (employee, day). Free start
+    times for a service come from a handful of bitwise operations on those
+    masks rather than walking time slots.
+    """
+    
+    def __init__(self):
+        self._weekday_masks: Dict[str, Tuple[int, ...]] = {}
+        self._busy_masks: Dict[Tuple[str, date], int] = {}
+    
+    def set_working_hours(self, employee_id: str, hours: WeeklyHours):
+        masks = [0] * 7
+        for weekday, intervals in hours.items():
+            for start_minute, end_minute in intervals:
+                masks[weekday] |= interval_mask(start_minute, end_minute)
+        self._weekday_masks[employee_id] = tuple(masks)
+    
+    def free_mask(self, employee_id: str, day: date) -> int:
+        """Bitmap of working, unbooked minutes for an employee on a day"""
+        masks = self._weekday_masks.get(employee_id)
+        if masks is None:
+            return 0
+        return masks[day.weekday()] & ~self._busy_masks.get((employee_id, day), 0)
+    
+    def is_free(self, employee_id: str, day: date, start_minute: int, duration: int) -> bool:
+        wanted = interval_mask(start_minute, start_minute + duration)
+        return wanted != 0 and self.free_mask(employee_id, day) & wanted == wanted
+    
+    def mark_busy(self, employee_id: str, day: date, start_minute: int, duration: int):
+        key = (employee_id, day)
+        self._busy_masks[key] = self._busy_masks.get(key, 0) | interval_mask(start_minute, start_minute + duration)
+    
+    def mark_free(self, employee_id: str, day: date, start_minute: int, duration: int):
+        key = (employee_id, day)
+        busy = self._busy_masks.get(key, 0) & ~interval_mask(start_minute, start_minute + duration)
+        if busy:
+            self._busy_masks[key] = busy
+        else:
+            self._busy_masks.pop(key, None)
+    
+    def start_minutes(self, employee_id: str, day: date, duration: int) -> List[int]:
+        """Valid start minutes on the slot grid for a service of `duration` minutes"""
+        starts = run_starts(self.free_mask(employee_id, day), duration) & SLOT_GRID_MASK
+        return list(iter_bits(starts))
+    
+    def slots_for_day(self, service: Dict[str, Any], day: date, employee_centers: Dict[str, str]) -> List[Slot]:
+        """Build every bookable slot for a service on one day
+
+        `employee_centers` maps each employee to consider to their center ID.
+        """
+        duration = service["duration"]
+        slots = []
+        for employee_id, center_id in employee_centers.items():
+            for start_minute in self.start_minutes(employee_id, day, duration):
+                slots.append(Slot(
+                    id=encode_slot_id(employee_id, day, start_minute),
+                    center_id=center_id,
+                    service_id=service["id"],
+                    date=day,
+                    start_time=minute_to_time(start_minute),
+                    end_time=minute_to_time(start_minute + duration),
+                    employee_id=employee_id,
+                    price=service["price"],
+                    currency="USD"
+                ))
+        return slots
@@ -1,15 +1,41 @@
+import base64
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from app.models.client import ClientCreate, Client
 from app.models.employee import EmployeeCreate, Employee
 from app.models.service import Service
 from app.models.slot import Slot
 from app.models.booking import BookingCreate, BookingResponse, BookingDetail
+from app.utils.contacts import normalize_email, normalize_phone
+
+
+def encode_client_cursor(position: int) -> str:
+    """Encode a provider's client listing position as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"k:{position}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_client_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, position = base64.urlsafe_b64decode(padded).decode("utf-8").split(":", 1)
+        if prefix != "k":
+            raise ValueError
+        return int(position)
+    except ValueError:
+        raise ValueError("Invalid cursor")
 
 
 class BaseProvider(ABC):
     """Base class for calendar providers"""
     
+    # True when all state lives in this object, so dropping it loses data
+    in_memory = False
+    
+    async def close(self):
+        """Release connections and other resources held by the provider"""
+        pass
+    
     @abstractmethod
     async def create_client(self, client: ClientCreate) -> Client:
         pass
@@ -26,6 +52,57 @@ class BaseProvider(ABC):
     async def delete_client(self, client_id: str) -> bool:
         pass
     
+    async def create_clients(self, clients: List[ClientCreate]) -> List[Union[Client, Exception]]:
+        """Create many clients at once, getting each created client or the error that stopped it, in order
+        
+        Providers with an atomic bulk insert may raise instead, in which case
+        none of the clients were created. Providers with a cheaper bulk insert
+        should override this one-by-one fallback.
+        """
+        results: List[Union[Client, Exception]] = []
+        for client in clients:
+            try:
+                results.append(await self.create_client(client))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    async def list_clients(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Client], Optional[str]]:
+        """Get one page of clients and the cursor for the next page (None on the last page)
+        
+        Raises ValueError for a malformed cursor. This fallback pages over
+        get_all_clients; providers with ordered storage should override it.
+        """
+        start = decode_client_cursor(cursor) if cursor is not None else 0
+        clients = await self.get_all_clients()
+        end = start + limit
+        next_cursor = encode_client_cursor(end) if end < len(clients) else None
+        return clients[start:end], next_cursor
+    
+    async def find_clients_by_phone(self, phone: str) -> List[Client]:
+        """Get clients whose phone number has the same digits"""
+        wanted = normalize_phone(phone)
+        if wanted is None:
+            return []
+        return [client for client in await self.get_all_clients() if normalize_phone(client.phone) == wanted]
+    
+    async def find_clients_by_email(self, email: str) -> List[Client]:
+        """Get clients with the same email address, ignoring case"""
+        wanted = normalize_email(email)
+        if wanted is None:
+            return []
+        return [client for client in await self.get_all_clients() if normalize_email(client.email) == wanted]
+    
+    async def iter_clients(self, batch_size: int = 500) -> AsyncIterator[List[Client]]:
+        """Yield every client in batches of at most `batch_size`
+        
+        Providers that can page through their storage should override this,
+        so exports never hold the whole client list in memory.
+        """
+        clients = await self.get_all_clients()
+        for start in range(0, len(clients), batch_size):
+            yield clients[start:start + batch_size]
+    
     @abstractmethod
     async def create_employee(self, employee: EmployeeCreate) -> Employee:
         pass
@@ -50,6 +127,37 @@ class BaseProvider(ABC):
     async def get_available_slots(self, customer_id: str, service_id: str, date: str, employee_id: Optional[str] = None) -> List[Slot]:
         pass
     
+    async def search_available_slots(
+        self,
+        customer_id: str,
+        service_id: str,
+        start_date: date,
+        end_date: date,
+        employee_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, List[Slot]]:
+        """Get available slots for every day in [start_date, end_date], keyed by ISO date
+        
+        Days without slots are left out. With `limit`, stops once that many of
+        the earliest slots have been found. Providers that can compute a
+        range in one pass should override this per-day fallback.
+        """
+        slots_by_day: Dict[str, List[Slot]] = {}
+        found = 0
+        day = start_date
+        while day <= end_date and (limit is None or found < limit):
+            day_slots: List[Slot] = []
+            for employee_id in employee_ids or [None]:
+                day_slots.extend(await self.get_available_slots(customer_id, service_id, day.isoformat(), employee_id))
+            day_slots.sort(key=lambda slot: (slot.start_time, slot.employee_id))
+            if limit is not None:
+                day_slots = day_slots[:limit - found]
+            if day_slots:
+                slots_by_day[day.isoformat()] = day_slots
+                found += len(day_slots)
+            day += timedelta(days=1)
+        return slots_by_day
+    
     @abstractmethod
     async def create_booking(self, booking: BookingCreate) -> BookingResponse:
         pass
@@ -0,0 +1,225 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple, Union
+from datetime import date
+from app.providers.base import BaseProvider
+from app.utils.ttl_cache import TTLCache
+from app.models.client import ClientCreate, Client
+from app.models.employee import EmployeeCreate, Employee
+from app.models.service import Service
+from app.models.slot import Slot
+from app.models.booking import BookingCreate, BookingResponse, BookingDetail
+
+CLIENT_READS = frozenset({
+    "get_client", "get_all_clients", "list_clients", "find_clients_by_phone", "find_clients_by_email"
+})
+EMPLOYEE_READS = frozenset({"get_employee", "get_all_employees"})
+SLOT_READS = frozenset({"get_available_slots", "search_available_slots"})
+
+# Seconds each read stays cached; reads left out (or set to 0) always go to the provider.
+# Bookings are never cached since holds expire without a write.
+DEFAULT_TTLS: Dict[str, float] = {
+    "get_service": 300.0,
+    "get_all_services": 300.0,
+    "get_employee": 60.0,
+    "get_all_employees": 60.0,
+    "get_client": 30.0,
+    "get_all_clients": 30.0,
+    "list_clients": 30.0,
+    "find_clients_by_phone": 30.0,
+    "find_clients_by_email": 30.0,
+    "get_available_slots": 5.0,
+    "search_available_slots": 5.0
+}
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _copy(value: Any) -> Any:
+    """Copy the containers of a cached result so callers can't mutate the cached one"""
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    return value
+
+
+def _consume_exception(task: asyncio.Task):
+    # Mark the exception retrieved in case every waiter gave up
+    if not task.cancelled():
+        task.exception()
+
+
+class CachingProvider(BaseProvider):
+    """Read-through cache in front of any provider
+    
+    Reads are cached per method and arguments with per-method TTLs in one
+    bounded LRU. Writes drop every cached read they could have changed, and
+    concurrent misses for the same read share a single provider call. Each
+    caller gets its own copy of list, tuple and dict results; models inside
+    them are shared and must be treated as read-only.
+    """
+    
+    def __init__(self, provider: BaseProvider, ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024):
+        self.provider = provider
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._cache = TTLCache(max_entries)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Bumped on each invalidation so reads started before a write are not stored after it
+        self._generation = 0
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+    
+    @property
+    def in_memory(self) -> bool:
+        return self.provider.in_memory
+    
+    async def close(self):
+        self._cache.clear()
+        await self.provider.close()
+    
+    async def _cached(self, method: str, args: Tuple[Any, ...], load: Callable[[], Awaitable[Any]]) -> Any:
+        ttl = self.ttls.get(method, 0)
+        if ttl <= 0:
+            return await load()
+        
+        key = (method, *(_freeze(arg) for arg in args))
+        found, value = self._cache.get(key)
+        if found:
+            self.hits[method] = self.hits.get(method, 0) + 1
+            return _copy(value)
+        self.misses[method] = self.misses.get(method, 0) + 1
+        
+        # The load runs as its own task so a caller giving up doesn't cancel it for the others
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(key, ttl, load))
+            inflight.add_done_callback(_consume_exception)
+            self._inflight[key] = inflight
+        return _copy(await asyncio.shield(inflight))
+    
+    async def _load(self, key: Hashable, ttl: float, load: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generation
+        try:
+            value = await load()
+            if generation == self._generation:
+                self._cache.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+    
+    def invalidate(self, methods: FrozenSet[str]):
+        """Drop cached results of the given read methods"""
+        self._generation += 1
+        self._cache.invalidate(lambda key: key[0] in methods)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        methods = sorted(set(self.hits) | set(self.misses))
+        return {
+            "entries": len(self._cache),
+            "max_entries": self._cache.max_entries,
+            "methods": {
+                method: {"hits": self.hits.get(method, 0), "misses": self.misses.get(method, 0)}
+                for method in methods
+            }
+        }
+    
+    async def create_client(self, client: ClientCreate) -> Client:
+        try:
+            return await self.provider.create_client(client)
+        finally:
+            self.invalidate(CLIENT_READS)
+    
+    async def create_clients(self, clients: List[ClientCreate]) -> List[Union[Client, Exception]]:
+        try:
+            return await self.provider.create_clients(clients)
+        finally:
+            self.invalidate(CLIENT_READS)
+    
+    async def get_client(self, client_id: str) -> Optional[Client]:
+        return await self._cached("get_client", (client_id,), lambda: self.provider.get_client(client_id))
+    
+    async def get_all_clients(self) -> List[Client]:
+        return await self._cached("get_all_clients", (), self.provider.get_all_clients)
+    
+    async def list_clients(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Client], Optional[str]]:
+        return await self._cached(
+            "list_clients", (cursor, limit), lambda: self.provider.list_clients(cursor, limit)
+        )
+    
+    async def find_clients_by_phone(self, phone: str) -> List[Client]:
+        return await self._cached(
+            "find_clients_by_phone", (phone,), lambda: self.provider.find_clients_by_phone(phone)
+        )
+    
+    async def find_clients_by_email(self, email: str) -> List[Client]:
+        return await self._cached(
+            "find_clients_by_email", (email,), lambda: self.provider.find_clients_by_email(email)
+        )
+    
+    async def iter_clients(self, batch_size: int = 500) -> AsyncIterator[List[Client]]:
+        async for batch in self.provider.iter_clients(batch_size):
+            yield batch
+    
+    async def delete_client(self, client_id: str) -> bool:
+        try:
+            return await self.provider.delete_client(client_id)
+        finally:
+            self.invalidate(CLIENT_READS)
+    
+    async def create_employee(self, employee: EmployeeCreate) -> Employee:
+        try:
+            return await self.provider.create_employee(employee)
+        finally:
+            self.invalidate(EMPLOYEE_READS | SLOT_READS)
+    
+    async def get_employee(self, employee_id: str) -> Optional[Employee]:
+        return await self._cached("get_employee", (employee_id,), lambda: self.provider.get_employee(employee_id))
+    
+    async def get_all_employees(self) -> List[Employee]:
+        return await self._cached("get_all_employees", (), self.provider.get_all_employees)
+    
+    async def get_service(self, service_id: str) -> Optional[Service]:
+        return await self._cached("get_service", (service_id,), lambda: self.provider.get_service(service_id))
+    
+    async def get_all_services(self) -> List[Service]:
+        return await self._cached("get_all_services", (), self.provider.get_all_services)
+    
+    async def get_available_slots(self, customer_id: str, service_id: str, date: str, employee_id: Optional[str] = None) -> List[Slot]:
+        return await self._cached(
+            "get_available_slots",
+            (customer_id, service_id, date, employee_id),
+            lambda: self.provider.get_available_slots(customer_id, service_id, date, employee_id)
+        )
+    
+    async def search_available_slots(
+        self,
+        customer_id: str,
+        service_id: str,
+        start_date: date,
+        end_date: date,
+        employee_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, List[Slot]]:
+        return await self._cached(
+            "search_available_slots",
+            (customer_id, service_id, start_date, end_date, employee_ids, limit),
+            lambda: self.provider.search_available_slots(
+                customer_id, service_id, start_date, end_date, employee_ids, limit
+            )
+        )
+    
+    async def create_booking(self, booking: BookingCreate) -> BookingResponse:
+        # Invalidate even on failure: a conflict means cached slots were stale
+        try:
+            return await self.provider.create_booking(booking)
+        finally:
+            self.invalidate(SLOT_READS)
+    
+    async def get_booking(self, booking_id: str) -> Optional[BookingDetail]:
+        return await self._cached("get_booking", (booking_id,), lambda: self.provider.get_booking(booking_id))
@@ -0,0 +1,135 @@
+import time
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List
+from app.config import settings
+from app.providers.base import BaseProvider
+from app.providers.caching_provider import CachingProvider
+from app.providers.sqlite_provider import SQLiteProvider
+from app.providers.test_provider import TestProvider
+from app.providers.zenoti_provider import ZenotiProvider
+
+DEFAULT_TENANT = "default"
+
+
+def create_provider(config: Dict[str, Any]) -> BaseProvider:
+    """Build a provider from a tenant config such as {"provider": "sqlite", "sqlite_path": "data/brand.db"}
+    
+    Zenoti tenants take "base_url", "api_key" and "center_id", defaulting to the ZENOTI_* settings.
+    """
+    kind = config.get("provider", settings.PROVIDER)
+    if kind == "test":
+        provider = TestProvider()
+    elif kind == "sqlite":
+        provider = SQLiteProvider(config.get("sqlite_path"), config.get("sqlite_pool_size"))
+    elif kind == "zenoti":
+        provider = ZenotiProvider(config.get("base_url"), config.get("api_key"), config.get("center_id"))
+    else:
+        raise ValueError(f"Unknown provider: {kind}")
+    
+    if config.get("cache", settings.PROVIDER_CACHE_ENABLED):
+        provider = CachingProvider(
+            provider,
+            ttls={**settings.PROVIDER_CACHE_TTLS, **config.get("cache_ttls", {})},
+            max_entries=config.get("cache_max_entries", settings.PROVIDER_CACHE_MAX_ENTRIES)
+        )
+    return provider
+
+
+class PooledProvider:
+    """A live provider instance and its usage bookkeeping"""
+    
+    __slots__ = ("provider", "leases", "last_used")
+    
+    def __init__(self, provider: BaseProvider):
+        self.provider = provider
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+
+class ProviderRegistry:
+    """Lazily created, pooled provider instances, one per tenant
+    
+    Instances are built on a tenant's first request and kept in LRU order.
+    After each request, instances idle for longer than `idle_timeout` and the
+    least recently used ones beyond `max_providers` are closed, releasing
+    their connection pools. Instances with requests in flight are never
+    evicted, and neither are in-memory providers, whose state would be lost.
+    """
+    
+    def __init__(
+        self,
+        tenants: Dict[str, Dict[str, Any]],
+        max_providers: int = 16,
+        idle_timeout: float = 600.0,
+        factory: Callable[[Dict[str, Any]], BaseProvider] = create_provider
+    ):
+        self.tenants = tenants
+        self.max_providers = max_providers
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self._pool: "OrderedDict[str, PooledProvider]" = OrderedDict()
+    
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self.tenants
+    
+    def _acquire(self, tenant_id: str) -> PooledProvider:
+        entry = self._pool.get(tenant_id)
+        if entry is None:
+            config = self.tenants.get(tenant_id)
+            if config is None:
+                raise KeyError(tenant_id)
+            entry = PooledProvider(self.factory(config))
+            self._pool[tenant_id] = entry
+        self._pool.move_to_end(tenant_id)
+        entry.leases += 1
+        return entry
+    
+    def _collect_evictions(self) -> List[BaseProvider]:
+        """Remove idle and over-budget instances from the pool and return them"""
+        now = time.monotonic()
+        evictable = [
+            tenant_id for tenant_id, entry in self._pool.items()
+            if entry.leases == 0 and not entry.provider.in_memory
+        ]
+        
+        evicted = []
+        over_budget = len(self._pool) - self.max_providers
+        for tenant_id in evictable:
+            if over_budget > 0 or now - self._pool[tenant_id].last_used > self.idle_timeout:
+                evicted.append(self._pool.pop(tenant_id).provider)
+                over_budget -= 1
+        return evicted
+    
+    @asynccontextmanager
+    async def lease(self, tenant_id: str) -> AsyncIterator[BaseProvider]:
+        """Use a tenant's provider for the duration of a request; raises KeyError for unknown tenants"""
+        entry = self._acquire(tenant_id)
+        try:
+            yield entry.provider
+        finally:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            for provider in self._collect_evictions():
+                await provider.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "max_providers": self.max_providers,
+            "idle_timeout": self.idle_timeout,
+            "providers": {
+                tenant_id: {
+                    "type": type(entry.provider).__name__,
+                    "leases": entry.leases,
+                    "idle_seconds": round(now - entry.last_used, 1)
+                }
+                for tenant_id, entry in self._pool.items()
+            }
+        }
+    
+    async def close_all(self):
+        entries = list(self._pool.values())
+        self._pool.clear()
+        await asyncio.gather(*(entry.provider.close() for entry in entries), return_exceptions=True)
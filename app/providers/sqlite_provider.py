@@ -0,0 +1,605 @@
+import json
+import queue
+import uuid
+import asyncio
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.config import settings
+from app.providers.base import BaseProvider, decode_client_cursor, encode_client_cursor
+from app.providers.availability import AvailabilityEngine, minute_to_time, parse_slot_id
+from app.providers.test_provider import SEED_EMPLOYEES, SEED_SERVICES
+from app.utils.exceptions import ServiceNotFoundError, SlotNotFoundError, SlotUnavailableError
+from app.utils.contacts import normalize_email, normalize_phone
+from app.utils.locks import KeyedLocks
+from app.models.client import ClientCreate, Client
+from app.models.employee import EmployeeCreate, Employee
+from app.models.service import Service
+from app.models.slot import Slot
+from app.models.booking import BookingCreate, BookingResponse, BookingDetail
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    phone TEXT,
+    email TEXT,
+    phone_normalized TEXT,
+    email_lower TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_clients_phone ON clients (phone_normalized);
+CREATE INDEX IF NOT EXISTS idx_clients_email ON clients (email_lower);
+
+CREATE TABLE IF NOT EXISTS employees (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    center_id TEXT NOT NULL,
+    phone TEXT,
+    specialties TEXT NOT NULL,
+    is_available INTEGER NOT NULL,
+    working_hours TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS services (
+    id TEXT PRIMARY KEY,
+    service_name TEXT NOT NULL,
+    price TEXT NOT NULL,
+    duration INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id TEXT PRIMARY KEY,
+    slot_id TEXT NOT NULL,
+    customer_id TEXT NOT NULL,
+    service_id TEXT NOT NULL,
+    employee_id TEXT NOT NULL,
+    center_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    expires_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_employee_day ON bookings (employee_id, day, start_minute);
+"""
+
+# A booking blocks its time while confirmed, or while its hold has not expired
+ACTIVE_BOOKING_CONDITION = "(status = 'confirmed' OR (status = 'reserved' AND expires_at > ?))"
+
+
+class SQLiteConnectionPool:
+    """A fixed set of SQLite connections shared by worker threads
+    
+    Connections run in WAL mode so readers never block the writer, and
+    sqlite3 keeps each connection's parsed statements cached, so the
+    parameterized queries below are prepared once per connection. Every
+    connection to ":memory:" opens its own empty database, so an in-memory
+    pool holds a single connection.
+    """
+    
+    def __init__(self, path: str, size: int = 4):
+        in_memory = path == ":memory:"
+        if in_memory:
+            size = 1
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        # Holds connections, or None once closed to wake up waiting threads
+        self._connections: "queue.Queue[Optional[sqlite3.Connection]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            connection = sqlite3.connect(
+                path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=256,
+                timeout=5.0
+            )
+            connection.row_factory = sqlite3.Row
+            if not in_memory:
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connections.put(connection)
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if self._closed:
+            raise RuntimeError("SQLite connection pool is closed")
+        connection = self._connections.get()
+        if connection is None:
+            # Pass the wake-up on to the next waiter
+            self._connections.put(None)
+            raise RuntimeError("SQLite connection pool is closed")
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                if self._closed:
+                    connection.close()
+                else:
+                    self._connections.put(connection)
+    
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn with a pooled connection in a worker thread"""
+        def _call() -> T:
+            with self.connection() as connection:
+                return fn(connection)
+        return await asyncio.to_thread(_call)
+    
+    def close(self):
+        """Close idle connections now and in-flight ones as they are returned"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            idle = []
+            while True:
+                try:
+                    connection = self._connections.get_nowait()
+                except queue.Empty:
+                    break
+                if connection is not None:
+                    idle.append(connection)
+            self._connections.put(None)
+        for connection in idle:
+            connection.close()
+
+
+class SQLiteProvider(BaseProvider):
+    """Provider backed by a SQLite database, safe to share between worker processes"""
+    
+    def __init__(self, path: Optional[str] = None, pool_size: Optional[int] = None):
+        self.pool = SQLiteConnectionPool(path or settings.SQLITE_PATH, pool_size or settings.SQLITE_POOL_SIZE)
+        # Cross-process safety comes from BEGIN IMMEDIATE; this only avoids
+        # in-process contention on the database write lock
+        self._schedule_locks = KeyedLocks()
+        with self.pool.connection() as connection:
+            connection.executescript(SCHEMA)
+            self._seed(connection)
+    
+    def _seed(self, connection: sqlite3.Connection):
+        """Insert the default employees and services into an empty database"""
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("SELECT 1 FROM services LIMIT 1").fetchone() is None:
+                connection.executemany(
+                    "INSERT INTO services (id, service_name, price, duration) VALUES (?, ?, ?, ?)",
+                    [
+                        (service["id"], service["service_name"], str(service["price"]), service["duration"])
+                        for service in SEED_SERVICES.values()
+                    ]
+                )
+            if connection.execute("SELECT 1 FROM employees LIMIT 1").fetchone() is None:
+                connection.executemany(
+                    "INSERT INTO employees (id, name, center_id, phone, specialties, is_available, working_hours) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [self._employee_params(employee) for employee in SEED_EMPLOYEES.values()]
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+    
+    @staticmethod
+    def _employee_params(employee: Dict[str, Any]) -> tuple:
+        return (
+            employee["id"],
+            employee["name"],
+            employee["center_id"],
+            employee["phone"],
+            json.dumps(employee["specialties"]),
+            int(employee["is_available"]),
+            json.dumps({str(weekday): hours for weekday, hours in employee["working_hours"].items()})
+        )
+    
+    @staticmethod
+    def _row_to_client(row: sqlite3.Row) -> Client:
+        return Client(
+            id=row["id"],
+            name=row["name"],
+            phone=row["phone"],
+            email=row["email"],
+            created_at=row["created_at"]
+        )
+    
+    @staticmethod
+    def _row_to_employee(row: sqlite3.Row) -> Employee:
+        return Employee(
+            id=row["id"],
+            name=row["name"],
+            center_id=row["center_id"],
+            specialties=json.loads(row["specialties"]),
+            phone=row["phone"],
+            is_available=bool(row["is_available"])
+        )
+    
+    @staticmethod
+    def _row_to_service(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "service_name": row["service_name"],
+            "price": Decimal(row["price"]),
+            "duration": row["duration"]
+        }
+    
+    async def close(self):
+        self.pool.close()
+    
+    async def create_client(self, client: ClientCreate) -> Client:
+        client_id = str(uuid.uuid4())
+        created_at = datetime.utcnow()
+        
+        def _insert(connection: sqlite3.Connection):
+            connection.execute(
+                "INSERT INTO clients (id, name, phone, email, phone_normalized, email_lower, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    client_id, client.name, client.phone, client.email,
+                    normalize_phone(client.phone), normalize_email(client.email), created_at.isoformat()
+                )
+            )
+        
+        await self.pool.run(_insert)
+        return Client(
+            id=client_id,
+            name=client.name,
+            phone=client.phone,
+            email=client.email,
+            created_at=created_at
+        )
+    
+    async def get_client(self, client_id: str) -> Optional[Client]:
+        row = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM clients WHERE id = ?", (client_id,)
+            ).fetchone()
+        )
+        return self._row_to_client(row) if row else None
+    
+    async def get_all_clients(self) -> List[Client]:
+        rows = await self.pool.run(
+            lambda connection: connection.execute("SELECT * FROM clients ORDER BY rowid").fetchall()
+        )
+        return [self._row_to_client(row) for row in rows]
+    
+    async def create_clients(self, clients: List[ClientCreate]) -> List[Client]:
+        created_at = datetime.utcnow()
+        created = [
+            Client(id=str(uuid.uuid4()), name=client.name, phone=client.phone, email=client.email, created_at=created_at)
+            for client in clients
+        ]
+        
+        def _insert(connection: sqlite3.Connection):
+            # One transaction per batch instead of one per row
+            connection.execute("BEGIN")
+            try:
+                connection.executemany(
+                    "INSERT INTO clients (id, name, phone, email, phone_normalized, email_lower, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            client.id, client.name, client.phone, client.email,
+                            normalize_phone(client.phone), normalize_email(client.email), created_at.isoformat()
+                        )
+                        for client in created
+                    ]
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        
+        await self.pool.run(_insert)
+        return created
+    
+    async def list_clients(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Client], Optional[str]]:
+        after_rowid = decode_client_cursor(cursor) if cursor is not None else 0
+        # Fetch one extra row to learn whether another page follows
+        rows = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT rowid, * FROM clients WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after_rowid, limit + 1)
+            ).fetchall()
+        )
+        page = rows[:limit]
+        next_cursor = encode_client_cursor(page[-1]["rowid"]) if len(rows) > limit else None
+        return [self._row_to_client(row) for row in page], next_cursor
+    
+    async def find_clients_by_phone(self, phone: str) -> List[Client]:
+        wanted = normalize_phone(phone)
+        if wanted is None:
+            return []
+        rows = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM clients WHERE phone_normalized = ? ORDER BY rowid", (wanted,)
+            ).fetchall()
+        )
+        return [self._row_to_client(row) for row in rows]
+    
+    async def find_clients_by_email(self, email: str) -> List[Client]:
+        wanted = normalize_email(email)
+        if wanted is None:
+            return []
+        rows = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM clients WHERE email_lower = ? ORDER BY rowid", (wanted,)
+            ).fetchall()
+        )
+        return [self._row_to_client(row) for row in rows]
+    
+    async def iter_clients(self, batch_size: int = 500) -> AsyncIterator[List[Client]]:
+        last_rowid = 0
+        while True:
+            rows = await self.pool.run(
+                lambda connection: connection.execute(
+                    "SELECT rowid, * FROM clients WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            )
+            if not rows:
+                return
+            yield [self._row_to_client(row) for row in rows]
+            last_rowid = rows[-1]["rowid"]
+    
+    async def delete_client(self, client_id: str) -> bool:
+        deleted = await self.pool.run(
+            lambda connection: connection.execute("DELETE FROM clients WHERE id = ?", (client_id,)).rowcount
+        )
+        return deleted > 0
+    
+    async def create_employee(self, employee: EmployeeCreate) -> Employee:
+        employee_id = str(uuid.uuid4())
+        internal_employee = {
+            "id": employee_id,
+            "name": employee.name,
+            "center_id": employee.center_id,
+            "phone": employee.phone,
+            "specialties": employee.specialties,
+            "is_available": True,
+            "working_hours": SEED_EMPLOYEES["1"]["working_hours"]
+        }
+        await self.pool.run(
+            lambda connection: connection.execute(
+                "INSERT INTO employees (id, name, center_id, phone, specialties, is_available, working_hours) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._employee_params(internal_employee)
+            )
+        )
+        return Employee(
+            id=employee_id,
+            name=employee.name,
+            center_id=employee.center_id,
+            specialties=employee.specialties,
+            phone=employee.phone,
+            is_available=True
+        )
+    
+    async def get_employee(self, employee_id: str) -> Optional[Employee]:
+        row = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM employees WHERE id = ?", (employee_id,)
+            ).fetchone()
+        )
+        return self._row_to_employee(row) if row else None
+    
+    async def get_all_employees(self) -> List[Employee]:
+        rows = await self.pool.run(
+            lambda connection: connection.execute("SELECT * FROM employees ORDER BY id").fetchall()
+        )
+        return [self._row_to_employee(row) for row in rows]
+    
+    async def get_service(self, service_id: str) -> Optional[Service]:
+        row = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM services WHERE id = ?", (service_id,)
+            ).fetchone()
+        )
+        return Service(**self._row_to_service(row)) if row else None
+    
+    async def get_all_services(self) -> List[Service]:
+        rows = await self.pool.run(
+            lambda connection: connection.execute("SELECT * FROM services ORDER BY id").fetchall()
+        )
+        return [Service(**self._row_to_service(row)) for row in rows]
+    
+    def _load_availability(
+        self,
+        connection: sqlite3.Connection,
+        service_id: str,
+        start_date: date,
+        end_date: date,
+        employee_ids: Optional[List[str]]
+    ) -> Optional[tuple]:
+        """Load the service, bookable employees and their active bookings for a date range"""
+        service_row = connection.execute("SELECT * FROM services WHERE id = ?", (service_id,)).fetchone()
+        if service_row is None:
+            return None
+        
+        if employee_ids:
+            placeholders = ", ".join("?" for _ in employee_ids)
+            employee_rows = connection.execute(
+                f"SELECT id, center_id, working_hours FROM employees "
+                f"WHERE is_available = 1 AND id IN ({placeholders}) ORDER BY id",
+                list(dict.fromkeys(employee_ids))
+            ).fetchall()
+        else:
+            employee_rows = connection.execute(
+                "SELECT id, center_id, working_hours FROM employees WHERE is_available = 1 ORDER BY id"
+            ).fetchall()
+        
+        availability = AvailabilityEngine()
+        employee_centers: Dict[str, str] = {}
+        for row in employee_rows:
+            hours = {int(weekday): intervals for weekday, intervals in json.loads(row["working_hours"]).items()}
+            availability.set_working_hours(row["id"], hours)
+            employee_centers[row["id"]] = row["center_id"]
+        
+        if employee_centers:
+            placeholders = ", ".join("?" for _ in employee_centers)
+            booking_rows = connection.execute(
+                f"SELECT employee_id, day, start_minute, end_minute FROM bookings "
+                f"WHERE employee_id IN ({placeholders}) AND day BETWEEN ? AND ? AND {ACTIVE_BOOKING_CONDITION}",
+                [*employee_centers, start_date.isoformat(), end_date.isoformat(), datetime.utcnow().isoformat()]
+            ).fetchall()
+            for row in booking_rows:
+                availability.mark_busy(
+                    row["employee_id"],
+                    date.fromisoformat(row["day"]),
+                    row["start_minute"],
+                    row["end_minute"] - row["start_minute"]
+                )
+        
+        return self._row_to_service(service_row), availability, employee_centers
+    
+    async def get_available_slots(self, customer_id: str, service_id: str, date: str, employee_id: Optional[str] = None) -> List[Slot]:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+        slots_by_day = await self.search_available_slots(
+            customer_id, service_id, day, day, [employee_id] if employee_id is not None else None
+        )
+        return slots_by_day.get(day.isoformat(), [])
+    
+    async def search_available_slots(
+        self,
+        customer_id: str,
+        service_id: str,
+        start_date: date,
+        end_date: date,
+        employee_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, List[Slot]]:
+        loaded = await self.pool.run(
+            lambda connection: self._load_availability(connection, service_id, start_date, end_date, employee_ids)
+        )
+        if loaded is None:
+            return {}
+        service, availability, employee_centers = loaded
+        
+        slots_by_day: Dict[str, List[Slot]] = {}
+        found = 0
+        day = start_date
+        while day <= end_date and (limit is None or found < limit):
+            day_slots = availability.slots_for_day(service, day, employee_centers)
+            day_slots.sort(key=lambda slot: (slot.start_time, slot.employee_id))
+            if limit is not None:
+                day_slots = day_slots[:limit - found]
+            if day_slots:
+                slots_by_day[day.isoformat()] = day_slots
+                found += len(day_slots)
+            day += timedelta(days=1)
+        return slots_by_day
+    
+    def _claim_slot(
+        self,
+        connection: sqlite3.Connection,
+        booking: BookingCreate,
+        employee_id: str,
+        day: date,
+        start_minute: int
+    ) -> Dict[str, Any]:
+        """Check the slot and insert the hold inside one write transaction"""
+        # BEGIN IMMEDIATE takes the database write lock up front, so the
+        # conflict check and insert are atomic across worker processes too
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            employee_row = connection.execute(
+                "SELECT working_hours, is_available FROM employees WHERE id = ?", (employee_id,)
+            ).fetchone()
+            if employee_row is None:
+                raise SlotNotFoundError()
+            if not employee_row["is_available"]:
+                raise SlotUnavailableError()
+            service_row = connection.execute(
+                "SELECT duration FROM services WHERE id = ?", (booking.service_id,)
+            ).fetchone()
+            if service_row is None:
+                raise ServiceNotFoundError()
+            
+            duration = service_row["duration"]
+            end_minute = start_minute + duration
+            now = datetime.utcnow()
+            
+            availability = AvailabilityEngine()
+            hours = {int(weekday): intervals for weekday, intervals in json.loads(employee_row["working_hours"]).items()}
+            availability.set_working_hours(employee_id, hours)
+            overlapping = connection.execute(
+                f"SELECT 1 FROM bookings WHERE employee_id = ? AND day = ? "
+                f"AND start_minute < ? AND end_minute > ? AND {ACTIVE_BOOKING_CONDITION} LIMIT 1",
+                (employee_id, day.isoformat(), end_minute, start_minute, now.isoformat())
+            ).fetchone()
+            if overlapping or not availability.is_free(employee_id, day, start_minute, duration):
+                raise SlotUnavailableError()
+            
+            record = {
+                "id": str(uuid.uuid4()),
+                "slot_id": booking.slot_id,
+                "customer_id": booking.customer_id,
+                "service_id": booking.service_id,
+                "employee_id": employee_id,
+                "center_id": booking.center_id,
+                "day": day.isoformat(),
+                "start_minute": start_minute,
+                "end_minute": end_minute,
+                "status": "reserved",
+                "expires_at": (now + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)).isoformat()
+            }
+            connection.execute(
+                "INSERT INTO bookings (id, slot_id, customer_id, service_id, employee_id, center_id, "
+                "day, start_minute, end_minute, status, expires_at) "
+                "VALUES (:id, :slot_id, :customer_id, :service_id, :employee_id, :center_id, "
+                ":day, :start_minute, :end_minute, :status, :expires_at)",
+                record
+            )
+            connection.execute("COMMIT")
+            return record
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+    
+    async def create_booking(self, booking: BookingCreate) -> BookingResponse:
+        try:
+            employee_id, day, start_minute = parse_slot_id(booking.slot_id)
+        except ValueError:
+            raise SlotNotFoundError()
+        if employee_id != booking.employee_id:
+            raise SlotNotFoundError()
+        
+        async with self._schedule_locks.hold((employee_id, day)):
+            record = await self.pool.run(
+                lambda connection: self._claim_slot(connection, booking, employee_id, day, start_minute)
+            )
+        
+        return BookingResponse(
+            id=record["id"],
+            slot_id=record["slot_id"],
+            status=record["status"],
+            expires_at=datetime.fromisoformat(record["expires_at"])
+        )
+    
+    async def get_booking(self, booking_id: str) -> Optional[BookingDetail]:
+        row = await self.pool.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM bookings WHERE id = ?", (booking_id,)
+            ).fetchone()
+        )
+        if not row:
+            return None
+        
+        status = row["status"]
+        if status == "reserved" and row["expires_at"] <= datetime.utcnow().isoformat():
+            status = "expired"
+        return BookingDetail(
+            id=row["id"],
+            status=status,
+            service_id=row["service_id"],
+            employee_id=row["employee_id"],
+            start_time=minute_to_time(row["start_minute"]),
+            end_time=minute_to_time(row["end_minute"])
+        )
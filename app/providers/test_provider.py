@@ -1,8 +1,20 @@
+import copy
 import uuid
-from typing import List, Optional, Dict, Any
-from datetime import datetime, time
+import heapq
+import bisect
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from app.providers.base import BaseProvider
+from app.config import settings
+from app.providers.base import BaseProvider, decode_client_cursor, encode_client_cursor
+from app.providers.availability import (
+    AvailabilityEngine,
+    DEFAULT_WORKING_HOURS,
+    minute_to_time,
+    parse_slot_id,
+)
+from app.utils.exceptions import ServiceNotFoundError, SlotNotFoundError, SlotUnavailableError
+from app.utils.contacts import normalize_email, normalize_phone
 from app.models.client import ClientCreate, Client
 from app.models.employee import EmployeeCreate, Employee
 from app.models.service import Service
@@ -10,45 +22,68 @@ from app.models.slot import Slot
 from app.models.booking import BookingCreate, BookingResponse, BookingDetail
 
 
+SEED_EMPLOYEES: Dict[str, Dict[str, Any]] = {
+    "1": {
+        "id": "1",
+        "name": "Sarah Johnson",
+        "center_id": "1",
+        "phone": "555-0123",
+        "specialties": ["Botox", "Facials"],
+        "is_available": True,
+        "working_hours": DEFAULT_WORKING_HOURS
+    },
+    "2": {
+        "id": "2",
+        "name": "Mike Chen", 
+        "center_id": "1", 
+        "phone": "555-0456",
+        "specialties": ["Massage", "Wellness"],
+        "is_available": True,
+        "working_hours": DEFAULT_WORKING_HOURS
+    }
+}
+
+SEED_SERVICES: Dict[str, Dict[str, Any]] = {
+    "1": {
+        "id": "1",
+        "service_name": "Botox Treatment",
+        "price": Decimal("300.00"),
+        "duration": 60
+    },
+    "2": {
+        "id": "2", 
+        "service_name": "Facial",
+        "price": Decimal("150.00"),
+        "duration": 90
+    }
+}
+
+
 class TestProvider(BaseProvider):
     """Test provider with hardcoded responses"""
     
+    in_memory = True
+    
     def __init__(self):
         self.clients: Dict[str, Dict[str, Any]] = {}
-        self.employees: Dict[str, Dict[str, Any]] = {
-            "1": {
-                "id": "1",
-                "name": "Sarah Johnson",
-                "center_id": "1",
-                "phone": "555-0123",
-                "specialties": ["Botox", "Facials"],
-                "is_available": True
-            },
-            "2": {
-                "id": "2",
-                "name": "Mike Chen", 
-                "center_id": "1", 
-                "phone": "555-0456",
-                "specialties": ["Massage", "Wellness"],
-                "is_available": True
-            }
-        }
-        self.services: Dict[str, Dict[str, Any]] = {
-            "1": {
-                "id": "1",
-                "service_name": "Botox Treatment",
-                "price": Decimal("300.00"),
-                "duration": 60
-            },
-            "2": {
-                "id": "2", 
-                "service_name": "Facial",
-                "price": Decimal("150.00"),
-                "duration": 90
-            }
-        }
+        self._client_models: Dict[str, Client] = {}
+        # Listing order: ascending sequence numbers (cursor positions) and their client IDs
+        self._client_seqs: List[int] = []
+        self._client_order: List[str] = []
+        self._next_client_seq = 0
+        # Secondary indexes: normalized phone / lower-cased email -> client IDs
+        self._client_ids_by_phone: Dict[str, List[str]] = {}
+        self._client_ids_by_email: Dict[str, List[str]] = {}
+        self.employees: Dict[str, Dict[str, Any]] = copy.deepcopy(SEED_EMPLOYEES)
+        self.services: Dict[str, Dict[str, Any]] = copy.deepcopy(SEED_SERVICES)
+        self.bookings: Dict[str, Dict[str, Any]] = {}
+        # (expires_at, booking_id) for every reservation hold, soonest first
+        self._hold_expiries: List[Tuple[datetime, str]] = []
+        self.availability = AvailabilityEngine()
+        for employee_id, employee in self.employees.items():
+            self.availability.set_working_hours(employee_id, employee["working_hours"])
     
-    async def create_client(self, client: ClientCreate) -> Client:
+    def _add_client(self, client: ClientCreate) -> Client:
         client_id = str(uuid.uuid4())
         internal_client = {
             "id": client_id,
@@ -59,40 +94,105 @@ class TestProvider(BaseProvider):
         }
         self.clients[client_id] = internal_client
         
-        return Client(
+        # Built once here and shared by every read instead of per call
+        model = Client(
             id=client_id,
             name=client.name,
             phone=client.phone,
             email=client.email
         )
+        self._client_models[client_id] = model
+        
+        self._client_seqs.append(self._next_client_seq)
+        self._client_order.append(client_id)
+        self._next_client_seq += 1
+        
+        phone = normalize_phone(client.phone)
+        if phone:
+            self._client_ids_by_phone.setdefault(phone, []).append(client_id)
+        email = normalize_email(client.email)
+        if email:
+            self._client_ids_by_email.setdefault(email, []).append(client_id)
+        return model
+    
+    async def create_client(self, client: ClientCreate) -> Client:
+        return self._add_client(client)
+    
+    async def create_clients(self, clients: List[ClientCreate]) -> List[Client]:
+        return [self._add_client(client) for client in clients]
     
     async def get_client(self, client_id: str) -> Optional[Client]:
-        client = self.clients.get(client_id)
-        if not client:
-            return None
-        return Client(
-            id=client["id"],
-            name=client["name"],
-            phone=client["phone"],
-            email=client["email"]
-        )
+        return self._client_models.get(client_id)
     
     async def get_all_clients(self) -> List[Client]:
-        return [
-            Client(
-                id=client["id"],
-                name=client["name"],
-                phone=client["phone"],
-                email=client["email"]
-            )
-            for client in self.clients.values()
+        return list(self._client_models.values())
+    
+    async def list_clients(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Client], Optional[str]]:
+        after_seq = decode_client_cursor(cursor) if cursor is not None else -1
+        
+        page: List[Client] = []
+        last_seq = after_seq
+        position = bisect.bisect_right(self._client_seqs, after_seq)
+        while position < len(self._client_order) and len(page) < limit:
+            model = self._client_models.get(self._client_order[position])
+            if model is not None:
+                page.append(model)
+                last_seq = self._client_seqs[position]
+            position += 1
+        
+        has_more = any(client_id in self._client_models for client_id in self._client_order[position:])
+        return page, encode_client_cursor(last_seq) if has_more else None
+    
+    async def find_clients_by_phone(self, phone: str) -> List[Client]:
+        wanted = normalize_phone(phone)
+        if wanted is None:
+            return []
+        return [self._client_models[client_id] for client_id in self._client_ids_by_phone.get(wanted, ())]
+    
+    async def find_clients_by_email(self, email: str) -> List[Client]:
+        wanted = normalize_email(email)
+        if wanted is None:
+            return []
+        return [self._client_models[client_id] for client_id in self._client_ids_by_email.get(wanted, ())]
+    
+    async def iter_clients(self, batch_size: int = 500) -> AsyncIterator[List[Client]]:
+        cursor = None
+        while True:
+            batch, cursor = await self.list_clients(cursor, batch_size)
+            if batch:
+                yield batch
+            if cursor is None:
+                return
+    
+    def _compact_client_order(self):
+        """Drop deleted clients from the listing order once they make up half of it"""
+        if len(self._client_order) < 2 * len(self.clients):
+            return
+        kept = [
+            (seq, client_id) for seq, client_id in zip(self._client_seqs, self._client_order)
+            if client_id in self.clients
         ]
+        self._client_seqs = [seq for seq, _ in kept]
+        self._client_order = [client_id for _, client_id in kept]
     
     async def delete_client(self, client_id: str) -> bool:
-        if client_id in self.clients:
-            del self.clients[client_id]
-            return True
-        return False
+        client = self.clients.pop(client_id, None)
+        if client is None:
+            return False
+        del self._client_models[client_id]
+        
+        for index, key in (
+            (self._client_ids_by_phone, normalize_phone(client["phone"])),
+            (self._client_ids_by_email, normalize_email(client["email"]))
+        ):
+            client_ids = index.get(key)
+            if client_ids:
+                client_ids.remove(client_id)
+                if not client_ids:
+                    del index[key]
+        
+        self._compact_client_order()
+        return True
     
     async def create_employee(self, employee: EmployeeCreate) -> Employee:
         employee_id = str(uuid.uuid4())
@@ -102,9 +202,11 @@ class TestProvider(BaseProvider):
             "center_id": employee.center_id,
             "phone": employee.phone,
             "specialties": employee.specialties,
-            "is_available": True
+            "is_available": True,
+            "working_hours": DEFAULT_WORKING_HOURS
         }
         self.employees[employee_id] = internal_employee
+        self.availability.set_working_hours(employee_id, internal_employee["working_hours"])
         
         return Employee(
             id=employee_id,
@@ -150,36 +252,126 @@ class TestProvider(BaseProvider):
     async def get_all_services(self) -> List[Service]:
         return [Service(**service) for service in self.services.values()]
     
+    def _slots_for_day(self, service: Dict[str, Any], day: date, employee_ids: List[str]) -> List[Slot]:
+        """Build every bookable slot for a service on one day"""
+        employee_centers = {
+            employee_id: self.employees[employee_id]["center_id"] for employee_id in employee_ids
+        }
+        return self.availability.slots_for_day(service, day, employee_centers)
+    
+    def _bookable_employee_ids(self, employee_ids: Optional[List[str]] = None) -> List[str]:
+        if employee_ids:
+            return [
+                emp_id for emp_id in dict.fromkeys(employee_ids)
+                if emp_id in self.employees and self.employees[emp_id]["is_available"]
+            ]
+        return [emp_id for emp_id, emp in self.employees.items() if emp["is_available"]]
+    
+    def _expire_holds(self):
+        """Release every hold whose expiry has passed, soonest first"""
+        now = datetime.utcnow()
+        while self._hold_expiries and self._hold_expiries[0][0] <= now:
+            _, booking_id = heapq.heappop(self._hold_expiries)
+            booking = self.bookings.get(booking_id)
+            if booking and booking["status"] == "reserved" and booking["expires_at"] <= now:
+                booking["status"] = "expired"
+                self.availability.mark_free(
+                    booking["employee_id"], booking["date"], booking["start_minute"], booking["duration"]
+                )
+    
     async def get_available_slots(self, customer_id: str, service_id: str, date: str, employee_id: Optional[str] = None) -> List[Slot]:
-        return [
-            Slot(
-                id="1",
-                center_id="1", 
-                service_id=service_id,
-                date=date,
-                start_time=time(9, 0),
-                end_time=time(10, 0),
-                employee_id=employee_id or "1",
-                price=Decimal("300.00"),
-                currency="USD"
-            )
-        ]
+        self._expire_holds()
+        service = self.services.get(service_id)
+        if not service:
+            return []
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+        employee_ids = [employee_id] if employee_id is not None else None
+        return self._slots_for_day(service, day, self._bookable_employee_ids(employee_ids))
+    
+    async def search_available_slots(
+        self,
+        customer_id: str,
+        service_id: str,
+        start_date: date,
+        end_date: date,
+        employee_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, List[Slot]]:
+        self._expire_holds()
+        service = self.services.get(service_id)
+        if not service:
+            return {}
+        bookable_ids = self._bookable_employee_ids(employee_ids)
+        
+        slots_by_day: Dict[str, List[Slot]] = {}
+        found = 0
+        day = start_date
+        while day <= end_date and (limit is None or found < limit):
+            day_slots = self._slots_for_day(service, day, bookable_ids)
+            day_slots.sort(key=lambda slot: (slot.start_time, slot.employee_id))
+            if limit is not None:
+                day_slots = day_slots[:limit - found]
+            if day_slots:
+                slots_by_day[day.isoformat()] = day_slots
+                found += len(day_slots)
+            day += timedelta(days=1)
+        return slots_by_day
     
     async def create_booking(self, booking: BookingCreate) -> BookingResponse:
+        try:
+            employee_id, day, start_minute = parse_slot_id(booking.slot_id)
+        except ValueError:
+            raise SlotNotFoundError()
+        if employee_id != booking.employee_id or employee_id not in self.employees:
+            raise SlotNotFoundError()
+        
+        service = self.services.get(booking.service_id)
+        if not service:
+            raise ServiceNotFoundError()
+        duration = service["duration"]
+        
+        # Checking and claiming the slot never awaits, so on one event loop
+        # it is atomic without a lock
+        self._expire_holds()
+        
+        if not self.availability.is_free(employee_id, day, start_minute, duration):
+            raise SlotUnavailableError()
+        self.availability.mark_busy(employee_id, day, start_minute, duration)
+        
         booking_id = str(uuid.uuid4())
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+        self.bookings[booking_id] = {
+            "id": booking_id,
+            "slot_id": booking.slot_id,
+            "customer_id": booking.customer_id,
+            "service_id": booking.service_id,
+            "employee_id": employee_id,
+            "center_id": booking.center_id,
+            "date": day,
+            "start_minute": start_minute,
+            "duration": duration,
+            "status": "reserved",
+            "expires_at": expires_at
+        }
+        heapq.heappush(self._hold_expiries, (expires_at, booking_id))
+        
         return BookingResponse(
             id=booking_id,
             slot_id=booking.slot_id,
             status="reserved",
-            expires_at=datetime.utcnow()
+            expires_at=expires_at
         )
     
     async def get_booking(self, booking_id: str) -> Optional[BookingDetail]:
+        self._expire_holds()
+        booking = self.bookings.get(booking_id)
+        if not booking:
+            return None
         return BookingDetail(
-            id=booking_id,
-            status="confirmed",
-            service_id="1",
-            employee_id="1",
-            start_time=time(9, 0),
-            end_time=time(10, 0)
+            id=booking["id"],
+            status=booking["status"],
+            service_id=booking["service_id"],
+            employee_id=booking["employee_id"],
+            start_time=minute_to_time(booking["start_minute"]),
+            end_time=minute_to_time(booking["start_minute"] + booking["duration"])
         ) 
\ No newline at end of file
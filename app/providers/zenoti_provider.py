@@ -1,48 +1,470 @@
-from typing import List, Optional
-from app.providers.base import BaseProvider
+import asyncio
+import httpx
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple, TypeVar, Union
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.config import settings
+from app.providers.base import BaseProvider, decode_client_cursor, encode_client_cursor
+from app.providers.availability import encode_slot_id, minute_to_time, parse_slot_id, time_to_minute
+from app.utils import fast_json
+from app.utils.contacts import normalize_email, normalize_phone
+from app.utils.exceptions import (
+    SearchTooBroadError, ServiceNotFoundError, SlotNotFoundError, SlotUnavailableError, UpstreamError
+)
+from app.utils.http_client import CircuitOpenError, UpstreamClient
+from app.utils.rate_limit import RateLimitExceeded, TokenBucket
 from app.models.client import ClientCreate, Client
 from app.models.employee import EmployeeCreate, Employee
 from app.models.service import Service
 from app.models.slot import Slot
 from app.models.booking import BookingCreate, BookingResponse, BookingDetail
 
+T = TypeVar("T")
+
+# Employee ID of slots and bookings left to Zenoti to assign a therapist
+ANY_THERAPIST = "any"
+
+
+def _split_name(name: Optional[str]) -> Tuple[str, str]:
+    first_name, _, last_name = (name or "").strip().partition(" ")
+    return first_name, last_name.strip()
+
+
+def _full_name(personal_info: Dict[str, Any]) -> str:
+    return " ".join(
+        part for part in (personal_info.get("first_name"), personal_info.get("last_name")) if part
+    )
+
+
+def _mobile_number(personal_info: Dict[str, Any]) -> Optional[str]:
+    return (personal_info.get("mobile_phone") or {}).get("number") or None
+
 
 class ZenotiProvider(BaseProvider):
-    """Zenoti provider - stub implementation"""
+    """Zenoti provider backed by the Zenoti REST API
+    
+    All calls share one pooled async HTTP client whose token bucket keeps us
+    within Zenoti's request quota. Paginated listings are consumed as async
+    streams, and routes that need several upstream calls issue them
+    concurrently, at most ZENOTI_MAX_CONCURRENCY at a time per provider.
+    
+    Slot searches open a draft Zenoti booking per day (per day and therapist
+    when specific therapists are requested) to read its free slots, and
+    release it afterwards. Slots found without a therapist are offered under
+    ANY_THERAPIST and Zenoti assigns the therapist when one is reserved.
+    """
+    
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        center_id: Optional[str] = None,
+        http_client: Optional[UpstreamClient] = None
+    ):
+        self.center_id = center_id or settings.ZENOTI_CENTER_ID
+        self.page_size = settings.ZENOTI_PAGE_SIZE
+        self.http_client = http_client or UpstreamClient(
+            base_url=base_url or settings.ZENOTI_BASE_URL,
+            headers={
+                "Authorization": f"apikey {api_key or settings.ZENOTI_API_KEY}",
+                "Accept": "application/json"
+            },
+            timeout=settings.ZENOTI_TIMEOUT,
+            max_connections=settings.ZENOTI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ZENOTI_MAX_CONNECTIONS,
+            retries=settings.ZENOTI_RETRIES,
+            rate_limiter=TokenBucket(
+                settings.ZENOTI_RATE_LIMIT, settings.ZENOTI_RATE_BURST, max_wait=settings.ZENOTI_RATE_MAX_WAIT
+            )
+        )
+        self._concurrency = asyncio.Semaphore(settings.ZENOTI_MAX_CONCURRENCY)
+    
+    async def close(self):
+        await self.http_client.aclose()
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        retry: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Call Zenoti and parse the JSON body; returns None on 404"""
+        try:
+            response = await self.http_client.arequest(method, path, retry=retry, params=params, json=json)
+        except (httpx.HTTPError, CircuitOpenError, RateLimitExceeded) as e:
+            raise UpstreamError(f"Zenoti request failed: {e}")
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 400:
+            raise UpstreamError(f"Zenoti returned {response.status_code} for {method} {path}")
+        return fast_json.loads(response.content) if response.content else {}
+    
+    async def _paginate(self, path: str, key: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every item of a paginated listing, fetching the next page while the current one is consumed"""
+        async def fetch(page: int) -> Dict[str, Any]:
+            return await self._request("GET", path, params={**(params or {}), "page": page, "size": self.page_size}) or {}
+        
+        page = 1
+        next_page: Optional[asyncio.Task] = asyncio.ensure_future(fetch(page))
+        try:
+            while next_page is not None:
+                payload = await next_page
+                items = payload.get(key) or []
+                total = (payload.get("page_info") or {}).get("total")
+                if total is None:
+                    has_more = len(items) == self.page_size
+                else:
+                    has_more = page * self.page_size < total
+                
+                next_page = None
+                if has_more and items:
+                    page += 1
+                    next_page = asyncio.ensure_future(fetch(page))
+                for item in items:
+                    yield item
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+    
+    @staticmethod
+    def _to_client(guest: Dict[str, Any]) -> Client:
+        personal_info = guest.get("personal_info") or {}
+        return Client(
+            id=str(guest["id"]),
+            name=_full_name(personal_info) or None,
+            phone=_mobile_number(personal_info),
+            email=personal_info.get("email") or None,
+            created_at=guest.get("created_date")
+        )
+    
+    def _to_employee(self, therapist: Dict[str, Any]) -> Employee:
+        personal_info = therapist.get("personal_info") or {}
+        return Employee(
+            id=str(therapist["id"]),
+            name=_full_name(personal_info) or therapist.get("name") or "",
+            center_id=str(therapist.get("center_id") or self.center_id),
+            specialties=therapist.get("specialties") or [],
+            phone=_mobile_number(personal_info),
+            is_available=therapist.get("is_active", True)
+        )
+    
+    @staticmethod
+    def _to_service(service: Dict[str, Any]) -> Dict[str, Any]:
+        price_info = service.get("price_info") or {}
+        return {
+            "id": str(service["id"]),
+            "service_name": service.get("name") or "",
+            "price": Decimal(str(price_info.get("sale_price") or 0)),
+            "duration": int(service.get("duration") or 0)
+        }
     
     async def create_client(self, client: ClientCreate) -> Client:
-        # TODO: Implement Zenoti API integration
-        pass
+        first_name, last_name = _split_name(client.name)
+        guest = await self._request(
+            "POST",
+            "/guests",
+            json={
+                "center_id": self.center_id,
+                "personal_info": {
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "email": client.email,
+                    "mobile_phone": {"number": client.phone} if client.phone else None
+                }
+            },
+            retry=False
+        )
+        return self._to_client(guest)
+    
+    async def _bounded(self, call: Awaitable[T]) -> T:
+        """Await an upstream call within the provider's concurrency limit"""
+        async with self._concurrency:
+            return await call
+    
+    async def create_clients(self, clients: List[ClientCreate]) -> List[Union[Client, Exception]]:
+        # Zenoti has no bulk guest endpoint, so each guest succeeds or fails on its own
+        return list(await asyncio.gather(
+            *(self._bounded(self.create_client(client)) for client in clients),
+            return_exceptions=True
+        ))
     
     async def get_client(self, client_id: str) -> Optional[Client]:
-        pass
+        guest = await self._request("GET", f"/guests/{client_id}")
+        return self._to_client(guest) if guest else None
     
     async def get_all_clients(self) -> List[Client]:
-        pass
+        return [
+            self._to_client(guest)
+            async for guest in self._paginate("/guests/search", "guests", {"center_id": self.center_id})
+        ]
+    
+    async def list_clients(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Client], Optional[str]]:
+        # The cursor is the next Zenoti page number for this page size
+        page = decode_client_cursor(cursor) if cursor is not None else 1
+        payload = await self._request(
+            "GET", "/guests/search", params={"center_id": self.center_id, "page": page, "size": limit}
+        ) or {}
+        guests = payload.get("guests") or []
+        total = (payload.get("page_info") or {}).get("total")
+        has_more = len(guests) == limit if total is None else page * limit < total
+        return [self._to_client(guest) for guest in guests], encode_client_cursor(page + 1) if has_more and guests else None
+    
+    async def find_clients_by_phone(self, phone: str) -> List[Client]:
+        wanted = normalize_phone(phone)
+        if wanted is None:
+            return []
+        return [
+            self._to_client(guest)
+            async for guest in self._paginate("/guests/search", "guests", {"center_id": self.center_id, "phone": wanted})
+        ]
+    
+    async def find_clients_by_email(self, email: str) -> List[Client]:
+        wanted = normalize_email(email)
+        if wanted is None:
+            return []
+        return [
+            self._to_client(guest)
+            async for guest in self._paginate("/guests/search", "guests", {"center_id": self.center_id, "email": wanted})
+        ]
+    
+    async def iter_clients(self, batch_size: int = 500) -> AsyncIterator[List[Client]]:
+        batch: List[Client] = []
+        async for guest in self._paginate("/guests/search", "guests", {"center_id": self.center_id}):
+            batch.append(self._to_client(guest))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
     
     async def delete_client(self, client_id: str) -> bool:
-        pass
+        return await self._request("DELETE", f"/guests/{client_id}", retry=False) is not None
     
     async def create_employee(self, employee: EmployeeCreate) -> Employee:
-        pass
+        first_name, last_name = _split_name(employee.name)
+        therapist = await self._request(
+            "POST",
+            "/employees",
+            json={
+                "center_id": employee.center_id,
+                "personal_info": {
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "mobile_phone": {"number": employee.phone} if employee.phone else None
+                },
+                "specialties": employee.specialties
+            },
+            retry=False
+        )
+        return self._to_employee(therapist)
     
     async def get_employee(self, employee_id: str) -> Optional[Employee]:
-        pass
+        therapist = await self._request("GET", f"/employees/{employee_id}")
+        return self._to_employee(therapist) if therapist else None
     
     async def get_all_employees(self) -> List[Employee]:
-        pass
+        return [
+            self._to_employee(therapist)
+            async for therapist in self._paginate(f"/centers/{self.center_id}/therapists", "therapists")
+        ]
+    
+    async def _get_service_data(self, service_id: str) -> Optional[Dict[str, Any]]:
+        service = await self._request("GET", f"/centers/{self.center_id}/services/{service_id}")
+        return self._to_service(service) if service else None
     
     async def get_service(self, service_id: str) -> Optional[Service]:
-        pass
+        service = await self._get_service_data(service_id)
+        return Service(**service) if service else None
     
     async def get_all_services(self) -> List[Service]:
-        pass
+        return [
+            Service(**self._to_service(service))
+            async for service in self._paginate(f"/centers/{self.center_id}/services", "services")
+        ]
+    
+    async def _open_booking(self, customer_id: str, service_id: str, day: date, employee_id: Optional[str]) -> str:
+        """Start a Zenoti booking for one service, with a therapist or any, and get its ID"""
+        item: Dict[str, Any] = {"item": {"id": service_id}}
+        if employee_id is not None and employee_id != ANY_THERAPIST:
+            item["therapist"] = {"id": employee_id}
+        payload = await self._request(
+            "POST",
+            "/bookings",
+            json={
+                "center_id": self.center_id,
+                "date": day.isoformat(),
+                "guests": [{"id": customer_id, "items": [item]}]
+            },
+            retry=False
+        )
+        if not payload or not payload.get("id"):
+            raise UpstreamError("Zenoti did not return a booking ID")
+        return str(payload["id"])
+    
+    async def _release_booking(self, booking_id: str):
+        """Discard a draft booking, ignoring failures since Zenoti expires drafts anyway"""
+        try:
+            await self._request("DELETE", f"/bookings/{booking_id}", retry=False)
+        except UpstreamError:
+            pass
+    
+    async def _start_minutes(self, customer_id: str, service_id: str, day: date, employee_id: Optional[str]) -> List[int]:
+        """Free start times (minutes past midnight) on one day, for one therapist or any"""
+        async with self._concurrency:
+            booking_id = await self._open_booking(customer_id, service_id, day, employee_id)
+            try:
+                payload = await self._request("GET", f"/bookings/{booking_id}/slots") or {}
+            finally:
+                await asyncio.shield(self._release_booking(booking_id))
+        minutes = []
+        for slot in payload.get("slots") or []:
+            if not slot.get("Available"):
+                continue
+            start = datetime.fromisoformat(slot["Time"])
+            if start.date() == day:
+                minutes.append(time_to_minute(start.time()))
+        return minutes
+    
+    async def _slots_for_days(
+        self,
+        customer_id: str,
+        service_id: str,
+        days: List[date],
+        employee_ids: Optional[List[str]]
+    ) -> Dict[date, List[Slot]]:
+        """Build slots for every day (and requested therapist), querying them concurrently"""
+        if len(days) > settings.ZENOTI_MAX_SEARCH_DAYS:
+            raise SearchTooBroadError(f"Slot searches are limited to {settings.ZENOTI_MAX_SEARCH_DAYS} days")
+        if employee_ids:
+            employee_ids = list(dict.fromkeys(employee_ids))
+            if len(employee_ids) > settings.ZENOTI_MAX_SEARCH_THERAPISTS:
+                raise SearchTooBroadError(
+                    f"Slot searches are limited to {settings.ZENOTI_MAX_SEARCH_THERAPISTS} employees"
+                )
+            service, employees = await asyncio.gather(
+                self._get_service_data(service_id),
+                asyncio.gather(*(self.get_employee(employee_id) for employee_id in employee_ids))
+            )
+            employees = [employee for employee in employees if employee and employee.is_available]
+            pairs = [(day, employee.id, employee.center_id) for day in days for employee in employees]
+        else:
+            service = await self._get_service_data(service_id)
+            pairs = [(day, ANY_THERAPIST, self.center_id) for day in days]
+        if not service:
+            return {}
+        
+        start_minutes = await asyncio.gather(*(
+            self._start_minutes(customer_id, service_id, day, employee_id) for day, employee_id, _ in pairs
+        ))
+        
+        slots_by_day: Dict[date, List[Slot]] = {day: [] for day in days}
+        for (day, employee_id, center_id), minutes in zip(pairs, start_minutes):
+            for start_minute in minutes:
+                slots_by_day[day].append(Slot(
+                    id=encode_slot_id(employee_id, day, start_minute),
+                    center_id=center_id,
+                    service_id=service["id"],
+                    date=day,
+                    start_time=minute_to_time(start_minute),
+                    end_time=minute_to_time(start_minute + service["duration"]),
+                    employee_id=employee_id,
+                    price=service["price"],
+                    currency="USD"
+                ))
+        for day_slots in slots_by_day.values():
+            day_slots.sort(key=lambda slot: (slot.start_time, slot.employee_id))
+        return slots_by_day
     
     async def get_available_slots(self, customer_id: str, service_id: str, date: str, employee_id: Optional[str] = None) -> List[Slot]:
-        pass
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+        employee_ids = [employee_id] if employee_id is not None else None
+        slots_by_day = await self._slots_for_days(customer_id, service_id, [day], employee_ids)
+        return slots_by_day.get(day, [])
+    
+    async def search_available_slots(
+        self,
+        customer_id: str,
+        service_id: str,
+        start_date: date,
+        end_date: date,
+        employee_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, List[Slot]]:
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        slots_by_day = await self._slots_for_days(customer_id, service_id, days, employee_ids)
+        
+        result: Dict[str, List[Slot]] = {}
+        found = 0
+        for day in days:
+            day_slots = slots_by_day.get(day, [])
+            if limit is not None:
+                day_slots = day_slots[:limit - found]
+            if day_slots:
+                result[day.isoformat()] = day_slots
+                found += len(day_slots)
+            if limit is not None and found >= limit:
+                break
+        return result
     
     async def create_booking(self, booking: BookingCreate) -> BookingResponse:
-        pass
+        try:
+            employee_id, day, start_minute = parse_slot_id(booking.slot_id)
+        except ValueError:
+            raise SlotNotFoundError()
+        if employee_id != booking.employee_id:
+            raise SlotNotFoundError()
+        if await self._get_service_data(booking.service_id) is None:
+            raise ServiceNotFoundError()
+        
+        booking_id = await self._open_booking(booking.customer_id, booking.service_id, day, employee_id)
+        slot_time = datetime.combine(day, minute_to_time(start_minute))
+        reservation = None
+        try:
+            reservation = await self._request(
+                "POST",
+                f"/bookings/{booking_id}/slots/reserve",
+                json={"slot_time": slot_time.isoformat()},
+                retry=False
+            )
+        except UpstreamError:
+            pass
+        finally:
+            # Don't leave the draft booking open upstream when the slot wasn't reserved
+            if not reservation or not reservation.get("is_reserved"):
+                await asyncio.shield(self._release_booking(booking_id))
+        if not reservation or not reservation.get("is_reserved"):
+            raise SlotUnavailableError()
+        
+        expiry_time = reservation.get("expiry_time")
+        if expiry_time:
+            expires_at = datetime.fromisoformat(expiry_time)
+        else:
+            expires_at = datetime.utcnow() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+        return BookingResponse(
+            id=booking_id,
+            slot_id=booking.slot_id,
+            status="reserved",
+            expires_at=expires_at
+        )
     
     async def get_booking(self, booking_id: str) -> Optional[BookingDetail]:
-        pass 
\ No newline at end of file
+        payload = await self._request("GET", f"/bookings/{booking_id}")
+        if not payload:
+            return None
+        items = [item for guest in payload.get("guests") or [] for item in guest.get("items") or []]
+        if not items:
+            return None
+        item = items[0]
+        # Unconfirmed bookings may not have a time yet, which BookingDetail can't represent
+        if not item.get("start_time") or not item.get("end_time"):
+            return None
+        return BookingDetail(
+            id=str(payload.get("id") or booking_id),
+            status=str(payload.get("status") or "reserved"),
+            service_id=str((item.get("item") or {}).get("id")),
+            employee_id=str((item.get("therapist") or {}).get("id") or ANY_THERAPIST),
+            start_time=datetime.fromisoformat(item["start_time"]).time(),
+            end_time=datetime.fromisoformat(item["end_time"]).time()
+        )
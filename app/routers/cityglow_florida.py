@@ -1,25 +1,109 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
-from app.services.cityglow_service import cityglow_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Callable, Dict, Any, FrozenSet, List, Literal, Optional
+from app.models.cityglow import ServiceBatchRequest
+from app.config import settings
+from app.services.cityglow_service import CityGlowService, catalogs
+from app.services.cityglow_snapshot import ALL_DATA_FIELDS, CatalogSnapshot
+from app.utils.compression import choose_encoding
 
 router = APIRouter()
 
 
+async def get_catalog(request: Request) -> CityGlowService:
+    """Get the catalog for the company in the path, or City Glow Florida"""
+    # Async so the registry's bookkeeping (and any eviction) runs on the event loop
+    company_id = request.path_params.get("company_id", settings.MANGOMINT_COMPANY_ID)
+    if company_id not in catalogs:
+        raise HTTPException(status_code=404, detail=f"Company '{company_id}' not found")
+    return catalogs.get(company_id)
+
+
+async def get_loaded_catalog(service: CityGlowService = Depends(get_catalog)) -> CityGlowService:
+    """Get the company's catalog, loading it on demand if it is not in memory"""
+    await service.ensure_loaded()
+    return service
+
+
+def _etag_matches(if_none_match: str, etag: str, match_any: bool = True) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (match_any and candidate == "*") or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _cached_json_response(
+    request: Request,
+    service: CityGlowService,
+    key: str,
+    builder: Callable[[CatalogSnapshot], Dict[str, Any]]
+) -> Response:
+    """Serve a pre-rendered (and pre-compressed) catalog response, answering 304 when the client copy is current"""
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if_none_match = request.headers.get("if-none-match")
+    
+    # ETags depend only on the data version, key and coding, so a client
+    # holding the one this request would be served is answered without
+    # rendering anything. "*" needs the resource to exist, so it waits.
+    if if_none_match:
+        etag = service.get_response_etag(key, encoding)
+        if _etag_matches(if_none_match, etag, match_any=False):
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+    
+    rendered = service.get_cached_response(key, builder)
+    body, etag = rendered.variant(encoding)
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if body is not rendered.body:
+        headers["Content-Encoding"] = encoding
+    
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _parse_fields(fields: Optional[str]) -> FrozenSet[str]:
+    """Parse a comma-separated get_all field selector"""
+    if fields is None:
+        return ALL_DATA_FIELDS
+    
+    selected_fields = frozenset(field.strip() for field in fields.split(",") if field.strip())
+    unknown_fields = selected_fields - ALL_DATA_FIELDS
+    if unknown_fields:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+    return selected_fields
+
 
 @router.get("/service_categories", summary="Get Service Categories")
-async def get_service_categories() -> Dict[str, Any]:
+async def get_service_categories(
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
     """Get all available service categories"""
     try:
-        return cityglow_service.get_service_categories()
+        return _cached_json_response(
+            request, service, "service_categories", CatalogSnapshot.get_service_categories
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading service categories: {str(e)}")
 
 
 @router.get("/services/{service_category}", summary="Get Services by Category")
-async def get_services(service_category: str) -> Dict[str, Any]:
+async def get_services(
+    service_category: str,
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
     """Get all services within a specific category"""
     try:
-        return cityglow_service.get_services_by_category(service_category)
+        return _cached_json_response(
+            request,
+            service,
+            f"services:{service_category}",
+            lambda snapshot: snapshot.get_services_by_category(service_category)
+        )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -27,10 +111,19 @@ async def get_services(service_category: str) -> Dict[str, Any]:
 
 
 @router.get("/addons/{service_name}", summary="Get Service Add-ons")
-async def get_addons(service_name: str) -> Dict[str, Any]:
+async def get_addons(
+    service_name: str,
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
     """Get available add-ons for a specific service"""
     try:
-        return cityglow_service.get_addons_by_service(service_name)
+        return _cached_json_response(
+            request,
+            service,
+            f"addons:{service_name}",
+            lambda snapshot: snapshot.get_addons_by_service(service_name)
+        )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -38,20 +131,138 @@ async def get_addons(service_name: str) -> Dict[str, Any]:
 
 
 @router.get("/staff/{service_name}", summary="Get Service Staff")
-async def get_staff(service_name: str) -> Dict[str, Any]:
+async def get_staff(
+    service_name: str,
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
     """Get available staff for a specific service"""
     try:
-        return cityglow_service.get_staff_by_service(service_name)
+        return _cached_json_response(
+            request,
+            service,
+            f"staff:{service_name}",
+            lambda snapshot: snapshot.get_staff_by_service(service_name)
+        )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading staff: {str(e)}")
 
 
+@router.get("/pricing/{service_name}", summary="Get Per-Staff Pricing for a Service")
+async def get_pricing(
+    service_name: str,
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
+    """Get the effective price and duration of a service (by ID or name) for each staff member
+    
+    Staff-specific custom prices and durations take precedence over the
+    service defaults.
+    """
+    try:
+        return _cached_json_response(
+            request,
+            service,
+            f"pricing:{service_name}",
+            lambda snapshot: snapshot.get_service_pricing(service_name)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading pricing: {str(e)}")
+
+
+@router.get("/pricing/{service_name}/staff/{staff_id}", summary="Get a Staff Member's Price for a Service")
+async def get_staff_pricing(
+    service_name: str,
+    staff_id: int,
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
+    """Get the effective price and duration of a service (by ID or name) with one staff member"""
+    try:
+        return _cached_json_response(
+            request,
+            service,
+            f"pricing:{service_name}:{staff_id}",
+            lambda snapshot: snapshot.get_staff_service_pricing(service_name, staff_id)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading pricing: {str(e)}")
+
+
+@router.get("/price_matrix/{service_category}", summary="Get the Price Matrix of a Category")
+async def get_price_matrix(
+    service_category: str,
+    request: Request,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
+    """Get the effective price and duration of every service and staff pair in a category (by ID or name)"""
+    try:
+        return _cached_json_response(
+            request,
+            service,
+            f"price_matrix:{service_category}",
+            lambda snapshot: snapshot.get_price_matrix(service_category)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading price matrix: {str(e)}")
+
+
+@router.post("/batch", summary="Get Staff and Add-ons for Many Services")
+async def get_batch(
+    batch: ServiceBatchRequest,
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
+    """Get staff and add-on groups for several services in one call
+    
+    Services may be given by ID or by name (case-insensitive). Unknown
+    entries are listed under `not_found` instead of failing the request.
+    """
+    try:
+        return service.get_service_details_batch(batch.services)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading services: {str(e)}")
+
+
+@router.get("/search", summary="Search Services, Categories and Staff")
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    type: Optional[List[Literal["service", "category", "staff"]]] = Query(None),
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
+    """Autocomplete search over service, category and staff names
+    
+    Matches are case-insensitive and tolerate partial words and small typos;
+    results are ranked best first. Repeat `type` to restrict the result kinds.
+    """
+    try:
+        return service.search(q, limit=limit, types=type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
+
+
 @router.get("/get_all", summary="Get All Data")
-async def get_all() -> Dict[str, Any]:
+async def get_all(
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated optional service fields to include: description, staff, addons (default: all)"
+    ),
+    category: Optional[List[str]] = Query(None, description="Only include these categories (ID or name); repeatable"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Categories per page"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> Dict[str, Any]:
     """Get all data in a structured format:
-
+    
     ```
     {
         "total_categories": <number>,
@@ -90,31 +301,100 @@ async def get_all() -> Dict[str, Any]:
     }
     ```
     
+    Use `fields`, `category` and `limit`/`cursor` to fetch only part of the
+    tree; paginated responses also carry `next_cursor` (null on the last page).
+    
+    Responses carry an ETag; send it back in `If-None-Match` to get a 304
+    while the catalog is unchanged.
     """
+    selected_fields = _parse_fields(fields)
+    
+    if cursor is not None:
+        try:
+            CatalogSnapshot.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if selected_fields == ALL_DATA_FIELDS and not category and limit is None and cursor is None:
+        key = "get_all"
+    else:
+        key = "get_all:" + "&".join([
+            f"fields={','.join(sorted(selected_fields))}",
+            f"category={','.join(category or [])}",
+            f"limit={limit}",
+            f"cursor={cursor}"
+        ])
+    
     try:
-        return cityglow_service.get_all_data()
+        return _cached_json_response(
+            request,
+            service,
+            key,
+            lambda snapshot: snapshot.get_all_data(
+                fields=selected_fields, categories=category, cursor=cursor, limit=limit
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading all data: {str(e)}")
 
 
+@router.get("/get_all/stream", summary="Stream All Data as NDJSON")
+async def get_all_stream(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated optional service fields to include: description, staff, addons (default: all)"
+    ),
+    category: Optional[List[str]] = Query(None, description="Only include these categories (ID or name); repeatable"),
+    per: Literal["category", "service"] = Query("category", description="Emit one category or one service per line"),
+    service: CityGlowService = Depends(get_loaded_catalog)
+) -> StreamingResponse:
+    """Stream the same tree as `/get_all` as newline-delimited JSON
+    
+    With `per=category` each line is one category object including its
+    services; with `per=service` each line is one service carrying its
+    `category_id` and `category_name`. Lines are produced as they are sent.
+    """
+    selected_fields = _parse_fields(fields)
+    try:
+        lines = service.iter_all_data_ndjson(fields=selected_fields, categories=category, per=per)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading all data: {str(e)}")
+    
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get("/status", summary="Get Catalog Status")
+async def get_status(service: CityGlowService = Depends(get_catalog)) -> Dict[str, Any]:
+    """Get the age of the served catalog snapshot and the outcome of recent refreshes"""
+    return {**service.get_status(), "catalogs": catalogs.get_status()}
+
+
 @router.get("/refresh_data", summary="Refresh Services Data")
-async def refresh_data() -> Dict[str, Any]:
+async def refresh_data(service: CityGlowService = Depends(get_catalog)) -> Dict[str, Any]:
     """Refresh services data by fetching latest from mangomint API"""
     try:
-        # Use the service's reload method which handles the API call
-        cityglow_service.reload_data()
-        
-        # Get some stats from the reloaded data
-        categories_count = len(cityglow_service.startup_data.get('servicesInfo', {}).get('serviceCategories', []))
-        services_count = len(cityglow_service.startup_data.get('servicesInfo', {}).get('servicesById', {}))
+        # Fetch and rebuild off the event loop, then swap in the new snapshot
+        previous_fetched_at = service.fetched_at
+        snapshot = await service.refresh()
+        # A snapshot younger than the minimum refresh interval is served as-is
+        refreshed = snapshot.fetched_at != previous_fetched_at
         
         return {
             "success": True,
-            "message": "Services data refreshed successfully",
-            "categories_count": categories_count,
-            "services_count": services_count
+            "refreshed": refreshed,
+            "message": (
+                "Services data refreshed successfully" if refreshed
+                else f"Services data is less than {settings.CITYGLOW_REFRESH_MIN_INTERVAL:g}s old; not refreshed"
+            ),
+            "snapshot_age_seconds": snapshot.age_seconds,
+            "categories_count": snapshot.categories_count,
+            "services_count": snapshot.services_count
         }
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=500,
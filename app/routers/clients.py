@@ -1,12 +1,170 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+import io
+import csv
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
 from app.models.client import ClientCreate
-from app.schemas.client import ClientResponse
+from app.schemas.client import ClientImportError, ClientImportResponse, ClientPageResponse, ClientResponse
 from app.providers.base import BaseProvider
 from app.dependencies import get_provider
+from app.utils import fast_json
+from app.utils.streams import iter_csv_records, iter_lines
 
 router = APIRouter()
 
+# Rows handed to the provider per bulk insert
+IMPORT_BATCH_SIZE = 500
+
+# Only the first failures are itemized; the rest are just counted
+MAX_REPORTED_ERRORS = 100
+
+CLIENT_FIELDS = ("name", "phone", "email")
+EXPORT_FIELDS = ("id", "name", "phone", "email")
+
+ImportFormat = Literal["csv", "ndjson"]
+
+
+def _client_response(client) -> ClientResponse:
+    return ClientResponse(
+        id=client.id,
+        name=client.name,
+        phone=client.phone,
+        email=client.email
+    )
+
+
+async def _iter_import_rows(request: Request, format: ImportFormat) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    """Yield (row_number, fields) for each uploaded row, or (row_number, error) when it cannot be parsed"""
+    lines = iter_lines(request.stream())
+    if format == "ndjson":
+        row_number = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = fast_json.loads(line)
+            except ValueError as e:
+                yield row_number, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, "Expected a JSON object"
+                continue
+            yield row_number, row
+        return
+    
+    header: Optional[List[str]] = None
+    row_number = 0
+    async for record in iter_csv_records(lines):
+        if header is None:
+            header = [column.strip().lower() for column in record]
+            continue
+        row_number += 1
+        if len(record) > len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(record)}"
+            continue
+        yield row_number, {column: value or None for column, value in zip(header, record)}
+
+
+def _parse_client(row: Dict[str, Any]) -> ClientCreate:
+    """Validate one imported row; raises ValueError with a readable message"""
+    try:
+        client = ClientCreate.model_validate({field: row.get(field) for field in CLIENT_FIELDS})
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()))
+    if not any(getattr(client, field) for field in CLIENT_FIELDS):
+        raise ValueError("Row has no name, phone or email")
+    return client
+
+
+@router.post("/import", response_model=ClientImportResponse)
+async def import_clients(
+    request: Request,
+    format: Optional[ImportFormat] = Query(None, description="Defaults to csv for text/csv uploads, otherwise ndjson"),
+    provider: BaseProvider = Depends(get_provider)
+):
+    """Bulk import clients from a CSV or NDJSON request body, streamed and inserted in batches"""
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    imported = 0
+    failed = 0
+    errors: List[ClientImportError] = []
+    batch: List[Tuple[int, ClientCreate]] = []
+    
+    def record_error(row_number: int, error: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ClientImportError(row=row_number, error=error))
+    
+    async def flush():
+        nonlocal imported
+        if not batch:
+            return
+        try:
+            results = await provider.create_clients([client for _, client in batch])
+        except Exception as e:
+            for row_number, _ in batch:
+                record_error(row_number, f"Insert failed: {e}")
+        else:
+            for (row_number, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    record_error(row_number, f"Insert failed: {getattr(result, 'detail', None) or result}")
+                else:
+                    imported += 1
+        batch.clear()
+    
+    async for row_number, row in _iter_import_rows(request, format):
+        if isinstance(row, str):
+            record_error(row_number, row)
+            continue
+        try:
+            batch.append((row_number, _parse_client(row)))
+        except ValueError as e:
+            record_error(row_number, str(e))
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    await flush()
+    
+    return ClientImportResponse(imported=imported, failed=failed, errors=errors)
+
+
+@router.get("/export")
+async def export_clients(
+    format: ImportFormat = Query("ndjson"),
+    provider: BaseProvider = Depends(get_provider)
+):
+    """Stream every client as NDJSON or CSV without building the whole list in memory"""
+    async def ndjson_body() -> AsyncIterator[bytes]:
+        async for clients in provider.iter_clients(IMPORT_BATCH_SIZE):
+            yield b"".join(
+                fast_json.dumps({field: getattr(client, field) for field in EXPORT_FIELDS}) + b"\n"
+                for client in clients
+            )
+    
+    async def csv_body() -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(EXPORT_FIELDS)
+        async for clients in provider.iter_clients(IMPORT_BATCH_SIZE):
+            writer.writerows([getattr(client, field) for field in EXPORT_FIELDS] for client in clients)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    
+    if format == "csv":
+        return StreamingResponse(
+            csv_body(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="clients.csv"'}
+        )
+    return StreamingResponse(ndjson_body(), media_type="application/x-ndjson")
+
 
 @router.post("/", response_model=ClientResponse)
 async def create_client(
@@ -15,12 +173,23 @@ async def create_client(
 ):
     """Create a new client"""
     result = await provider.create_client(client)
-    return ClientResponse(
-        id=result.id,
-        name=result.name,
-        phone=result.phone,
-        email=result.email
-    )
+    return _client_response(result)
+
+
+@router.get("/lookup", response_model=List[ClientResponse])
+async def lookup_clients(
+    phone: Optional[str] = Query(None, description="Matched on digits only"),
+    email: Optional[str] = Query(None, description="Matched case-insensitively"),
+    provider: BaseProvider = Depends(get_provider)
+):
+    """Find clients by phone number or email address"""
+    if (phone is None) == (email is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of phone or email")
+    if phone is not None:
+        clients = await provider.find_clients_by_phone(phone)
+    else:
+        clients = await provider.find_clients_by_email(email)
+    return [_client_response(client) for client in clients]
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
@@ -32,29 +201,32 @@ async def get_client(
     client = await provider.get_client(client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    return ClientResponse(
-        id=client.id,
-        name=client.name,
-        phone=client.phone,
-        email=client.email
-    )
+    return _client_response(client)
 
 
-@router.get("/", response_model=List[ClientResponse])
+@router.get("/", response_model=Union[List[ClientResponse], ClientPageResponse])
 async def get_all_clients(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Clients per page"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
     provider: BaseProvider = Depends(get_provider)
 ):
-    """Get all clients"""
-    clients = await provider.get_all_clients()
-    return [
-        ClientResponse(
-            id=client.id,
-            name=client.name,
-            phone=client.phone,
-            email=client.email
-        )
-        for client in clients
-    ]
+    """Get all clients
+    
+    With `limit` (and `cursor` for later pages) returns one page as
+    `{"clients": [...], "next_cursor": ...}`; `next_cursor` is null on the last page.
+    """
+    if limit is None and cursor is None:
+        clients = await provider.get_all_clients()
+        return [_client_response(client) for client in clients]
+    
+    try:
+        clients, next_cursor = await provider.list_clients(cursor, limit or 100)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ClientPageResponse(
+        clients=[_client_response(client) for client in clients],
+        next_cursor=next_cursor
+    )
 
 
 @router.delete("/{client_id}")
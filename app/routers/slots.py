@@ -1,12 +1,29 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List
+from typing import List, Optional
 from datetime import date
-from app.schemas.slot import SlotResponse
+from app.schemas.slot import SlotDayResponse, SlotResponse, SlotSearchResponse
 from app.providers.base import BaseProvider
 from app.dependencies import get_provider
 
 router = APIRouter()
 
+# Widest date range accepted by a single slot search
+MAX_SEARCH_DAYS = 90
+
+
+def _slot_response(slot) -> SlotResponse:
+    return SlotResponse(
+        id=slot.id,
+        center_id=slot.center_id,
+        service_id=slot.service_id,
+        date=slot.date,
+        start_time=slot.start_time,
+        end_time=slot.end_time,
+        employee_id=slot.employee_id,
+        price=slot.price,
+        currency=slot.currency
+    )
+
 
 @router.get("/", response_model=List[SlotResponse])
 async def get_available_slots(
@@ -18,17 +35,34 @@ async def get_available_slots(
 ):
     """Get available slots"""
     slots = await provider.get_available_slots(customer_id, service_id, str(date), employee_id)
-    return [
-        SlotResponse(
-            id=slot.id,
-            center_id=slot.center_id,
-            service_id=slot.service_id,
-            date=slot.date,
-            start_time=slot.start_time,
-            end_time=slot.end_time,
-            employee_id=slot.employee_id,
-            price=slot.price,
-            currency=slot.currency
+    return [_slot_response(slot) for slot in slots]
+
+
+@router.get("/search", response_model=SlotSearchResponse)
+async def search_available_slots(
+    customer_id: str = Query(...),
+    service_id: str = Query(...),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    employee_id: Optional[List[str]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    provider: BaseProvider = Depends(get_provider)
+):
+    """Get available slots over a date range, optionally for several employees, grouped by day"""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= MAX_SEARCH_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must not exceed {MAX_SEARCH_DAYS} days")
+    
+    slots_by_day = await provider.search_available_slots(
+        customer_id, service_id, start_date, end_date, employee_id, limit
+    )
+    days = [
+        SlotDayResponse(
+            date=day,
+            slots=[_slot_response(slot) for slot in slots],
+            total=len(slots)
         )
-        for slot in slots
-    ] 
\ No newline at end of file
+        for day, slots in slots_by_day.items()
+    ]
+    return SlotSearchResponse(days=days, total=sum(day.total for day in days)) 
\ No newline at end of file
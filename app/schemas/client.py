@@ -11,4 +11,20 @@ class ClientResponse(BaseModel):
 
 class ClientListResponse(BaseModel):
     clients: List[ClientResponse]
-    total: int 
\ No newline at end of file
+    total: int 
+
+
+class ClientImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ClientImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ClientImportError]
+
+
+class ClientPageResponse(BaseModel):
+    clients: List[ClientResponse]
+    next_cursor: Optional[str] = None
@@ -18,4 +18,15 @@ class SlotResponse(BaseModel):
 
 class SlotListResponse(BaseModel):
     slots: List[SlotResponse]
-    total: int 
\ No newline at end of file
+    total: int
+
+
+class SlotDayResponse(BaseModel):
+    date: date
+    slots: List[SlotResponse]
+    total: int
+
+
+class SlotSearchResponse(BaseModel):
+    days: List[SlotDayResponse]
+    total: int
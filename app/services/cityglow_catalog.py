@@ -0,0 +1,282 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+# Staff category key of the price and working-day tables when the company
+# doesn't price by staff category
+ANY_STAFF_CATEGORY = "Any"
+
+
+def _day_ranges(ranges: Optional[List[Dict[str, int]]]) -> Tuple[Tuple[int, int], ...]:
+    """Convert upstream day-of-week ranges to (first day, last day inclusive) tuples"""
+    return tuple((day_range['beginDayOfWeek'], day_range['endDayOfWeekInclusive']) for day_range in ranges or ())
+
+
+class AddonOption:
+    """An add-on option offered within an option group"""
+    
+    __slots__ = ("id", "name", "price")
+    
+    def __init__(self, id: int, name: str, price: str):
+        self.id = id
+        self.name = name
+        self.price = price
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "name": self.name, "price": self.price}
+
+
+class OptionGroup:
+    """A group of add-on options, e.g. "Add-ons" with its prompt"""
+    
+    __slots__ = ("id", "name", "prompt", "options")
+    
+    def __init__(self, id: int, name: str, prompt: Optional[str], options: Tuple[AddonOption, ...]):
+        self.id = id
+        self.name = name
+        self.prompt = prompt
+        self.options = options
+
+
+class StaffMember:
+    """A staff member who can be booked"""
+    
+    __slots__ = ("id", "first_name", "last_name", "name", "days_worked")
+    
+    def __init__(
+        self,
+        id: int,
+        first_name: str,
+        last_name: Optional[str],
+        days_worked: Tuple[Tuple[int, int], ...] = ()
+    ):
+        self.id = id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.name = f"{first_name} {last_name}" if last_name else first_name
+        self.days_worked = days_worked
+
+
+class StaffOffering:
+    """A staff member's effective price and duration for one service"""
+    
+    __slots__ = ("staff_id", "price", "duration", "custom_price", "custom_duration")
+    
+    def __init__(self, staff_id: int, price: str, duration: int, custom_price: bool, custom_duration: bool):
+        self.staff_id = staff_id
+        self.price = price
+        self.duration = duration
+        self.custom_price = custom_price
+        self.custom_duration = custom_duration
+
+
+class Service:
+    """A bookable service with its default price and duration and who offers it at what price"""
+    
+    __slots__ = (
+        "id", "name", "category_id", "price", "duration", "description",
+        "min_price", "max_price", "is_price_range", "days_worked",
+        "offerings", "option_group_ids"
+    )
+    
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        category_id: int,
+        price: str,
+        duration: int,
+        description: Optional[str],
+        min_price: str,
+        max_price: str,
+        is_price_range: bool,
+        days_worked: Tuple[Tuple[int, int], ...],
+        offerings: Tuple[StaffOffering, ...],
+        option_group_ids: Tuple[int, ...]
+    ):
+        self.id = id
+        self.name = name
+        self.category_id = category_id
+        self.price = price
+        self.duration = duration
+        self.description = description
+        self.min_price = min_price
+        self.max_price = max_price
+        self.is_price_range = is_price_range
+        self.days_worked = days_worked
+        self.offerings = offerings
+        self.option_group_ids = option_group_ids
+    
+    def offering(self, staff_id: int) -> Optional[StaffOffering]:
+        """Get a staff member's offering for this service, or None if they don't perform it"""
+        for offering in self.offerings:
+            if offering.staff_id == staff_id:
+                return offering
+        return None
+
+
+class Category:
+    """A service category and its services in catalog order"""
+    
+    __slots__ = ("id", "name", "service_ids")
+    
+    def __init__(self, id: int, name: str, service_ids: Tuple[int, ...]):
+        self.id = id
+        self.name = name
+        self.service_ids = service_ids
+
+
+class Catalog:
+    """The parts of a mangomint startup payload the API serves, keyed by integer ID
+    
+    Everything else in the payload (settings, UI settings, payment accounts,
+    feature flags, ...) is dropped at parse time. References between records
+    that point at missing entries are dropped as well, so lookups through a
+    record's ID tuples never fail. Per-staff custom prices and durations are
+    resolved against the service defaults here, once per snapshot.
+    """
+    
+    __slots__ = ("categories", "services", "staff", "option_groups")
+    
+    def __init__(
+        self,
+        categories: Tuple[Category, ...],
+        services: Dict[int, Service],
+        staff: Dict[int, StaffMember],
+        option_groups: Dict[int, OptionGroup]
+    ):
+        self.categories = categories
+        self.services = services
+        self.staff = staff
+        self.option_groups = option_groups
+    
+    def canonical(self) -> List[Any]:
+        """Everything the catalog serves as plain JSON-able lists, for versioning"""
+        return [
+            [[category.id, category.name, list(category.service_ids)] for category in self.categories],
+            [
+                [
+                    service.id, service.name, service.category_id, service.price, service.duration,
+                    service.description, service.min_price, service.max_price, service.is_price_range,
+                    [list(day_range) for day_range in service.days_worked],
+                    [
+                        [offering.staff_id, offering.price, offering.duration,
+                         offering.custom_price, offering.custom_duration]
+                        for offering in service.offerings
+                    ],
+                    list(service.option_group_ids)
+                ]
+                for service in self.services.values()
+            ],
+            [
+                [staff.id, staff.first_name, staff.last_name, [list(day_range) for day_range in staff.days_worked]]
+                for staff in self.staff.values()
+            ],
+            [
+                [
+                    group.id, group.name, group.prompt,
+                    [[option.id, option.name, option.price] for option in group.options]
+                ]
+                for group in self.option_groups.values()
+            ]
+        ]
+    
+    @classmethod
+    def from_startup_data(cls, startup_data: Dict[str, Any]) -> "Catalog":
+        services_info = startup_data['servicesInfo']
+        staff_info = startup_data['staffInfo']
+        
+        staff = {
+            int(staff_id): StaffMember(
+                int(staff_id),
+                member['firstName'],
+                member.get('lastName'),
+                _day_ranges(member.get('daysWorkedRanges'))
+            )
+            for staff_id, member in staff_info['staffById'].items()
+        }
+        
+        options_by_group_id: Dict[int, list] = {}
+        for option_id, option in services_info.get('serviceOptionsById', {}).items():
+            options_by_group_id.setdefault(option.get('serviceOptionGroupId'), []).append(
+                AddonOption(int(option_id), option['name'], option['price'])
+            )
+        option_groups = {
+            int(group_id): OptionGroup(
+                int(group_id),
+                group.get('name', ''),
+                group.get('prompt'),
+                tuple(options_by_group_id.get(int(group_id), ()))
+            )
+            for group_id, group in services_info.get('serviceOptionGroupsById', {}).items()
+        }
+        
+        staff_ids_by_service = staff_info['staffIdsByServiceId']
+        option_group_ids_by_service = services_info.get('serviceOptionGroupIdsByServiceId', {})
+        mappings_by_service = services_info.get('staffServiceMappingByServiceIdAndStaffId', {})
+        price_info_by_service = services_info.get(
+            'priceInfoByStaffCategoryAndServiceId', {}
+        ).get(ANY_STAFF_CATEGORY, {})
+        days_worked_by_service = services_info.get(
+            'daysWorkedRangeByStaffCategoryAndServiceId', {}
+        ).get(ANY_STAFF_CATEGORY, {})
+        
+        services = {}
+        for service_id, service in services_info['servicesById'].items():
+            price = service['defaultPrice']
+            duration = service['defaultDuration']
+            mappings = mappings_by_service.get(service_id, {})
+            offerings = []
+            for staff_id in staff_ids_by_service.get(service_id, []):
+                if staff_id not in staff:
+                    continue
+                mapping = mappings.get(str(staff_id), {})
+                custom_price = mapping.get('customPrice')
+                custom_duration = mapping.get('customDuration')
+                offerings.append(StaffOffering(
+                    staff_id,
+                    custom_price if custom_price is not None else price,
+                    custom_duration if custom_duration is not None else duration,
+                    custom_price is not None,
+                    custom_duration is not None
+                ))
+            
+            price_info = price_info_by_service.get(service_id, {})
+            services[int(service_id)] = Service(
+                int(service_id),
+                service['name'],
+                service['serviceCategoryId'],
+                price,
+                duration,
+                service.get('description'),
+                price_info.get('minPrice', service.get('minPrice', price)),
+                price_info.get('maxPrice', service.get('maxPrice', price)),
+                price_info.get('isPriceRange', service.get('isPriceRange', False)),
+                _day_ranges(days_worked_by_service.get(service_id)),
+                tuple(offerings),
+                tuple(
+                    group_id for group_id in option_group_ids_by_service.get(service_id, [])
+                    if group_id in option_groups
+                )
+            )
+        
+        # Prefer the upstream category mapping, falling back to a single pass
+        # over servicesById when it is missing
+        service_ids_by_category = services_info.get('serviceIdsByCategoryId')
+        if service_ids_by_category is not None:
+            category_service_ids = {
+                int(category_id): tuple(
+                    int(service_id) for service_id in service_ids
+                    if int(service_id) in services
+                )
+                for category_id, service_ids in service_ids_by_category.items()
+            }
+        else:
+            grouped: Dict[int, list] = {}
+            for service in services.values():
+                grouped.setdefault(service.category_id, []).append(service.id)
+            category_service_ids = {category_id: tuple(ids) for category_id, ids in grouped.items()}
+        
+        categories = tuple(
+            Category(category['id'], category['name'], category_service_ids.get(category['id'], ()))
+            for category in services_info['serviceCategories']
+        )
+        return cls(categories, services, staff, option_groups)
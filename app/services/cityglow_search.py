@@ -0,0 +1,211 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, Any, Optional, Set, Tuple
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Prefixes longer than this fall back to trigram matching
+MAX_PREFIX_LENGTH = 12
+
+# Minimum share of the query's trigrams a name must contain to count as a fuzzy match
+MIN_FUZZY_CONTAINMENT = 0.5
+
+# Query tokens at least this long may also match with one (then two) typos:
+# substitutions, insertions, deletions or swapped neighbours
+MIN_EDIT_TOKEN_LENGTH = 3
+TWO_EDIT_TOKEN_LENGTH = 6
+
+
+def normalize(text: str) -> str:
+    """Lower-case and collapse everything but letters and digits into single spaces"""
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    """Get the character trigrams of each word of a normalized string, padded at word edges"""
+    grams = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Damerau (optimal string alignment) distance, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_row: Optional[List[int]] = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+    return min(row[len(b)], max_distance + 1)
+
+
+class SearchEntry:
+    """A searchable catalog item (service, category or staff member)"""
+    
+    __slots__ = ("type", "id", "name", "extra", "normalized", "tokens", "grams")
+    
+    def __init__(
+        self,
+        type: str,
+        id: int,
+        name: str,
+        extra: Dict[str, Any],
+        normalized: str,
+        grams: FrozenSet[str]
+    ):
+        self.type = type
+        self.id = id
+        self.name = name
+        self.extra = extra
+        self.normalized = normalized
+        self.tokens = tuple(normalized.split())
+        self.grams = grams
+
+
+class SearchIndex:
+    """Prefix and trigram index for typo-tolerant autocomplete over the catalog
+    
+    Building reuses the normalized forms and trigram sets of names already
+    present in the previous index, so a refresh only normalizes names that
+    changed; the postings and prefix tables are rebuilt in full.
+    """
+    
+    def __init__(self, items: Iterable[Tuple[str, int, str, Dict[str, Any]]], previous: Optional["SearchIndex"] = None):
+        previous_grams = previous._grams_by_name if previous else {}
+        
+        self.entries: List[SearchEntry] = []
+        self._grams_by_name: Dict[str, Tuple[str, FrozenSet[str]]] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._prefixes: Dict[str, Set[int]] = {}
+        
+        for type, id, name, extra in items:
+            cached = self._grams_by_name.get(name) or previous_grams.get(name)
+            if cached is None:
+                normalized = normalize(name)
+                cached = (normalized, trigrams(normalized))
+            self._grams_by_name[name] = cached
+            
+            entry_index = len(self.entries)
+            entry = SearchEntry(type, id, name, extra, cached[0], cached[1])
+            self.entries.append(entry)
+            
+            for gram in entry.grams:
+                self._postings.setdefault(gram, []).append(entry_index)
+            for token in entry.tokens:
+                for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                    self._prefixes.setdefault(token[:length], set()).add(entry_index)
+    
+    def _prefix_matches(self, tokens: List[str]) -> Set[int]:
+        """Entries where every query token is a prefix of some name token"""
+        matches: Optional[Set[int]] = None
+        for token in tokens:
+            if len(token) > MAX_PREFIX_LENGTH:
+                candidates = {
+                    i for i in self._prefixes.get(token[:MAX_PREFIX_LENGTH], ())
+                    if any(t.startswith(token) for t in self.entries[i].tokens)
+                }
+            else:
+                candidates = self._prefixes.get(token, set())
+            matches = candidates if matches is None else matches & candidates
+            if not matches:
+                return set()
+        return matches or set()
+    
+    def _edit_matches(self, tokens: List[str], skip: Iterable[int] = ()) -> Dict[int, int]:
+        """Entries where every query token is within a few typos of a name token or its prefix, with the total typos
+        
+        Candidates are limited to names with a token starting with the
+        query token's first character, which keeps the pass bounded.
+        """
+        skip = set(skip)
+        distances: Optional[Dict[int, int]] = None
+        for token in tokens:
+            if len(token) < MIN_EDIT_TOKEN_LENGTH:
+                candidates = {i: 0 for i in self._prefixes.get(token, ()) if i not in skip}
+            else:
+                max_distance = 2 if len(token) >= TWO_EDIT_TOKEN_LENGTH else 1
+                candidates = {}
+                for i in self._prefixes.get(token[0], ()):
+                    if i in skip or (distances is not None and i not in distances):
+                        continue
+                    best = min(
+                        min(edit_distance(token, name_token, max_distance),
+                            edit_distance(token, name_token[:len(token)], max_distance))
+                        for name_token in self.entries[i].tokens
+                        if name_token[0] == token[0]
+                    )
+                    if best <= max_distance:
+                        candidates[i] = best
+            if distances is None:
+                distances = candidates
+            else:
+                distances = {i: distances[i] + candidates[i] for i in distances if i in candidates}
+            if not distances:
+                return {}
+        return distances or {}
+    
+    def search(self, query: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get the best matches for a partial, case-insensitive or misspelled query"""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        allowed_types = set(types) if types else None
+        
+        scores: Dict[int, float] = {}
+        
+        # Prefix matches always outrank fuzzy ones
+        for i in self._prefix_matches(normalized.split()):
+            entry = self.entries[i]
+            if entry.normalized == normalized:
+                scores[i] = 1.0
+            elif entry.normalized.startswith(normalized):
+                scores[i] = 0.95
+            else:
+                scores[i] = 0.85
+        
+        query_grams = trigrams(normalized)
+        shared_counts: Dict[int, int] = {}
+        for gram in query_grams:
+            for i in self._postings.get(gram, ()):
+                shared_counts[i] = shared_counts.get(i, 0) + 1
+        
+        for i, shared in shared_counts.items():
+            if i in scores:
+                continue
+            containment = shared / len(query_grams)
+            if containment < MIN_FUZZY_CONTAINMENT:
+                continue
+            dice = 2 * shared / (len(query_grams) + len(self.entries[i].grams))
+            scores[i] = round(0.6 * containment + 0.2 * dice, 4)
+        
+        # Typos that break too many trigrams, such as swapped letters in a short word
+        prefix_matched = [i for i, score in scores.items() if score >= 0.85]
+        for i, distance in self._edit_matches(normalized.split(), skip=prefix_matched).items():
+            score = max(0.5, 0.8 - 0.1 * max(0, distance - 1))
+            if scores.get(i, 0.0) < score:
+                scores[i] = score
+        
+        ranked = sorted(
+            (i for i in scores if allowed_types is None or self.entries[i].type in allowed_types),
+            key=lambda i: (-scores[i], len(self.entries[i].name), self.entries[i].name)
+        )
+        
+        results = []
+        for i in ranked[:limit]:
+            entry = self.entries[i]
+            results.append({
+                "type": entry.type,
+                "id": entry.id,
+                "name": entry.name,
+                "score": scores[i],
+                **entry.extra
+            })
+        return results
@@ -1,14 +1,56 @@
-import json
-import requests
-from typing import Dict, Optional, Any
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Union
 from pathlib import Path
+from app.config import settings
+from app.services.cityglow_catalog import Catalog
+from app.services.cityglow_snapshot import ALL_DATA_FIELDS, CatalogSnapshot, RenderedResponse
+from app.utils import fast_json
+from app.utils.http_client import UpstreamClient
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PATH = "/api/v1/booking/app/startup"
+
+# Shared connection pool for all mangomint traffic
+mangomint_client = UpstreamClient(
+    base_url=settings.MANGOMINT_BASE_URL,
+    timeout=settings.MANGOMINT_TIMEOUT,
+    max_connections=settings.MANGOMINT_MAX_CONNECTIONS,
+    retries=settings.MANGOMINT_RETRIES
+)
 
 class CityGlowService:
-    """Service class for handling City Glow Florida booking data"""
+    """Service class for handling one mangomint company's booking data (City Glow Florida by default)"""
     
-    def __init__(self):
-        self.startup_data: Optional[Dict[str, Any]] = None
-        self._load_services_data()
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        http_client: Optional[UpstreamClient] = None,
+        company_id: Optional[str] = None,
+        refresh_interval: Optional[float] = None,
+        on_publish: Optional[Callable[["CityGlowService"], None]] = None
+    ):
+        self.company_id = company_id or settings.MANGOMINT_COMPANY_ID
+        self.http_client = http_client or mangomint_client
+        self.snapshot_path = Path(snapshot_path or settings.CITYGLOW_SNAPSHOT_PATH)
+        self.refresh_interval = refresh_interval or settings.CITYGLOW_REFRESH_INTERVAL
+        # Called whenever a new snapshot is published (e.g. to account for its memory)
+        self.on_publish = on_publish
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._disk_snapshot_checked = False
+        self._persisted_mtime: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._inflight_refresh: Optional[asyncio.Future] = None
+        self._inflight_disk_load: Optional[asyncio.Future] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.consecutive_failures = 0
     
     def _get_headers(self) -> Dict[str, str]:
         """Get the standard headers for mangomint API requests"""
@@ -16,295 +58,465 @@ class CityGlowService:
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:141.0) Gecko/20100101 Firefox/141.0",
             "Accept": "application/json",
             "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
             "Content-Type": "application/json",
             "Origin": "https://booking.mangomint.com",
             "DNT": "1",
-            "Connection": "keep-alive",
             "Sec-Fetch-Dest": "empty",
             "Sec-Fetch-Mode": "no-cors",
             "Sec-Fetch-Site": "cross-site",
             "TE": "trailers",
             "X-Mt-App-Version": "876d23a75fb9e556fe558bd419236c5439906e06",
-            "X-Mt-Booking-CompanyId": "722905",
+            "X-Mt-Booking-CompanyId": self.company_id,
             "Pragma": "no-cache",
             "Cache-Control": "no-cache",
-            "Referer": "https://booking.mangomint.com/722905",
+            "Referer": f"https://booking.mangomint.com/{self.company_id}",
             "Priority": "u=4"
         }
     
-    def _fetch_fresh_data(self) -> Dict[str, Any]:
-        """Fetch fresh data from mangomint API"""
-        response = requests.post(
-            "https://booking.mangomint.com/api/v1/booking/app/startup",
-            headers=self._get_headers(),
-            json={},
-            timeout=30.0
-        )
+    async def _afetch_fresh_payload(self) -> bytes:
+        """Fetch the raw startup payload from mangomint API without blocking the event loop"""
+        response = await self.http_client.arequest("POST", STARTUP_PATH, headers=self._get_headers(), json={})
         response.raise_for_status()
-        return response.json()
+        return response.content
     
-    def _load_services_data(self):
-        """Load services data by fetching from API"""
+    def _build_snapshot(self, payload: bytes) -> CatalogSnapshot:
+        """Build a fully indexed, pre-rendered snapshot from a raw payload and persist the payload"""
+        previous = self._snapshot
+        snapshot = CatalogSnapshot(
+            fast_json.loads(payload),
+            previous_search_index=previous.search_index if previous else None
+        )
+        snapshot.prerender()
+        self._save_snapshot_to_disk(payload)
+        return snapshot
+    
+    def _save_snapshot_to_disk(self, payload: bytes):
+        """Persist the startup payload as fetched so the next process start can serve it immediately"""
         try:
-            self.startup_data = self._fetch_fresh_data()
-        except Exception as e:
-            raise Exception(f"Failed to load services data: {e}")
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_name(f".{self.snapshot_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, self.snapshot_path)
+            self._persisted_mtime = self.snapshot_path.stat().st_mtime
+        except OSError as e:
+            logger.warning("Could not persist catalog snapshot to %s: %s", self.snapshot_path, e)
     
-    def reload_data(self):
-        """Reload services data by fetching fresh data from API"""
+    def _load_snapshot_from_disk(self) -> Optional[CatalogSnapshot]:
+        """Load and pre-render the last persisted startup payload, trusting it as written"""
         try:
-            self.startup_data = self._fetch_fresh_data()
-        except Exception as e:
-            raise Exception(f"Failed to reload data: {e}")
+            stat = self.snapshot_path.stat()
+            startup_data = fast_json.loads(self.snapshot_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable catalog snapshot %s: %s", self.snapshot_path, e)
+            return None
+        snapshot = CatalogSnapshot(startup_data, fetched_at=stat.st_mtime)
+        snapshot.prerender()
+        return snapshot
     
-    def get_service_categories(self) -> Dict[str, Any]:
-        """Get all available service categories"""
-        if not self.startup_data:
+    def _current_snapshot(self) -> CatalogSnapshot:
+        """Get the currently published snapshot, falling back to the on-disk copy
+        
+        The fallback loads synchronously and is meant for startup and scripts;
+        request handlers go through ensure_loaded, which loads in a worker thread.
+        """
+        snapshot = self._snapshot
+        if snapshot is None and not self._disk_snapshot_checked:
+            self._disk_snapshot_checked = True
+            snapshot = self._load_snapshot_from_disk()
+            if snapshot is not None:
+                self._publish(snapshot)
+        if snapshot is None:
             raise Exception("Services data not loaded")
+        return snapshot
+    
+    def _publish(self, snapshot: CatalogSnapshot):
+        self._snapshot = snapshot
+        if self.on_publish is not None:
+            self.on_publish(self)
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+    
+    def unload(self):
+        """Drop the in-memory snapshot and stop refreshing; the next read reloads it from disk"""
+        self._snapshot = None
+        self._disk_snapshot_checked = False
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None:
+            task.cancel()
+    
+    async def ensure_loaded(self) -> bool:
+        """Load the snapshot from disk or upstream if nothing is loaded yet; returns whether one is available"""
+        if await self._aloaded_snapshot() is not None:
+            return True
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning("Could not load catalog for company %s: %s", self.company_id, e)
+            return False
+        return True
+    
+    async def _aload_disk_snapshot(self):
+        """Load and publish the on-disk snapshot in a worker thread, shared by concurrent callers"""
+        inflight = self._inflight_disk_load
+        if inflight is None:
+            # Marked checked up front so nothing loads it again synchronously meanwhile
+            self._disk_snapshot_checked = True
+            inflight = self._inflight_disk_load = asyncio.ensure_future(
+                asyncio.to_thread(self._load_snapshot_from_disk)
+            )
+            inflight.add_done_callback(self._publish_disk_snapshot)
+        await asyncio.shield(inflight)
+    
+    def _publish_disk_snapshot(self, future: asyncio.Future):
+        self._inflight_disk_load = None
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.warning("Could not load catalog snapshot for company %s: %s", self.company_id, future.exception())
+            return
+        snapshot = future.result()
+        if snapshot is not None and self._snapshot is None:
+            self._publish(snapshot)
+    
+    @property
+    def catalog(self) -> Optional[Catalog]:
+        snapshot = self._snapshot
+        return snapshot.catalog if snapshot else None
+    
+    @property
+    def data_version(self) -> Optional[str]:
+        snapshot = self._snapshot
+        return snapshot.data_version if snapshot else None
+    
+    @property
+    def fetched_at(self) -> Optional[float]:
+        snapshot = self._snapshot
+        return snapshot.fetched_at if snapshot else None
+    
+    async def _aloaded_snapshot(self) -> Optional[CatalogSnapshot]:
+        """Get the current snapshot, loading the on-disk copy in a worker thread; None when there is none"""
+        if self._snapshot is None and (not self._disk_snapshot_checked or self._inflight_disk_load is not None):
+            await self._aload_disk_snapshot()
+        return self._snapshot
+    
+    async def refresh(self, force: bool = False) -> CatalogSnapshot:
+        """Reload services data without blocking the event loop
         
-        categories = self.startup_data['servicesInfo']['serviceCategories']
+        Concurrent callers share a single in-flight refresh, and a snapshot
+        younger than CITYGLOW_REFRESH_MIN_INTERVAL is returned as-is unless
+        force is set.
+        """
+        inflight = self._inflight_refresh
+        if inflight is None:
+            snapshot = await self._aloaded_snapshot()
+            # A refresh may have started while the disk snapshot was loading
+            inflight = self._inflight_refresh
+        if inflight is None:
+            if (not force and snapshot is not None
+                    and snapshot.age_seconds < settings.CITYGLOW_REFRESH_MIN_INTERVAL):
+                return snapshot
+            
+            inflight = self._inflight_refresh = asyncio.ensure_future(self._do_refresh(force))
+            inflight.add_done_callback(self._clear_inflight_refresh)
         
-        return {
-            "total": len(categories),
-            "categories": [
-                {
-                    "id": category['id'],
-                    "name": category['name']
-                }
-                for category in categories
-            ]
-        }
+        # Shield so one caller giving up doesn't cancel the fetch for the others
+        return await asyncio.shield(inflight)
     
-    def get_services_by_category(self, service_category: str) -> Dict[str, Any]:
-        """Get all services within a specific category"""
-        if not self.startup_data:
-            raise Exception("Services data not loaded")
+    def _clear_inflight_refresh(self, future: asyncio.Future):
+        if self._inflight_refresh is future:
+            self._inflight_refresh = None
+    
+    def _load_newer_disk_snapshot(self) -> Optional[CatalogSnapshot]:
+        """Pick up a snapshot another worker persisted within the minimum refresh interval"""
+        current = self._snapshot
+        try:
+            mtime = self.snapshot_path.stat().st_mtime
+        except OSError:
+            return None
+        if mtime == self._persisted_mtime:
+            return None
+        if current is not None and mtime <= current.fetched_at:
+            return None
+        if time.time() - mtime >= settings.CITYGLOW_REFRESH_MIN_INTERVAL:
+            return None
+        return self._load_snapshot_from_disk()
+    
+    async def _do_refresh(self, force: bool = False) -> CatalogSnapshot:
+        """Fetch and publish a new snapshot
         
-        categories = self.startup_data['servicesInfo']['serviceCategories']
-        services = self.startup_data['servicesInfo']['servicesById']
+        Unless forced, a snapshot freshly persisted by another worker is
+        reused instead of fetching again. The upstream fetch goes through the async connection pool and the
+        parse/index/render work runs in a worker thread; the new snapshot is
+        published with a single reference swap once complete.
+        """
+        try:
+            snapshot = None
+            if not force:
+                snapshot = await asyncio.to_thread(self._load_newer_disk_snapshot)
+            if snapshot is None:
+                payload = await self._afetch_fresh_payload()
+                snapshot = await asyncio.to_thread(self._build_snapshot, payload)
+        except Exception as e:
+            self.last_error = str(e)
+            self.last_error_at = time.time()
+            self.consecutive_failures += 1
+            raise Exception(f"Failed to reload data: {e}")
         
-        # Find category ID
-        category_id = None
-        for category in categories:
-            if category['name'].lower() == service_category.lower():
-                category_id = category['id']
-                break
+        self._publish(snapshot)
+        self.consecutive_failures = 0
+        return snapshot
+    
+    def _next_refresh_delay(self) -> float:
+        """Seconds until the next background refresh, with jitter and failure backoff"""
+        if self.consecutive_failures:
+            delay = min(
+                settings.CITYGLOW_REFRESH_RETRY_DELAY * 2 ** (self.consecutive_failures - 1),
+                settings.CITYGLOW_REFRESH_MAX_BACKOFF
+            )
+        else:
+            delay = self.refresh_interval
+        
+        jitter = settings.CITYGLOW_REFRESH_JITTER
+        return max(0.0, delay * random.uniform(1 - jitter, 1 + jitter))
+    
+    async def _refresh_loop(self):
+        """Periodically refresh the catalog, serving the last good snapshot meanwhile"""
+        snapshot = await self._aloaded_snapshot()
+        if snapshot is not None:
+            delay = max(0.0, self.refresh_interval - snapshot.age_seconds)
+        else:
+            delay = 0.0
         
-        if not category_id:
-            raise ValueError(f"Service category '{service_category}' not found")
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Background catalog refresh failed for company %s: %s", self.company_id, e)
+            delay = self._next_refresh_delay()
+    
+    def start_background_refresh(self):
+        """Start the background refresh loop on the running event loop"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop_background_refresh(self):
+        """Stop the background refresh loop"""
+        task, self._refresh_task = self._refresh_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get freshness information about the catalog in memory"""
+        snapshot = self._snapshot
         
-        # Filter services by category
-        filtered_services = {}
-        for sid, sinfo in services.items():
-            if sinfo['serviceCategoryId'] == category_id:
-                filtered_services[sid] = sinfo
+        def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+            if timestamp is None:
+                return None
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
         
         return {
-            "category": service_category,
-            "category_id": category_id,
-            "total": len(filtered_services),
-            "services": [
-                {
-                    "id": int(service_id),
-                    "name": service_info['name'],
-                    "price": service_info['defaultPrice'],
-                    "duration": service_info['defaultDuration'],
-                    "description": service_info.get('description')
-                }
-                for service_id, service_info in filtered_services.items()
-            ]
+            "company_id": self.company_id,
+            "loaded": snapshot is not None,
+            "data_version": snapshot.data_version if snapshot else None,
+            "fetched_at": _isoformat(snapshot.fetched_at) if snapshot else None,
+            "snapshot_age_seconds": snapshot.age_seconds if snapshot else None,
+            "memory_estimate_bytes": snapshot.memory_estimate if snapshot else None,
+            "refresh_interval": self.refresh_interval,
+            "refresh_in_flight": self._inflight_refresh is not None,
+            "background_refresh_running": self._refresh_task is not None and not self._refresh_task.done(),
+            "last_error": self.last_error,
+            "last_error_at": _isoformat(self.last_error_at),
+            "consecutive_failures": self.consecutive_failures
         }
     
+    def get_response_etag(self, key: str, encoding: Optional[str] = None) -> str:
+        """Get the ETag of a content coding of a response from the current snapshot"""
+        return self._current_snapshot().response_etag(key, encoding)
+    
+    def get_cached_response(
+        self,
+        key: str,
+        builder: Callable[[CatalogSnapshot], Dict[str, Any]]
+    ) -> RenderedResponse:
+        """Get a rendered response and its ETag from the current snapshot"""
+        return self._current_snapshot().get_cached_response(key, builder)
+    
+    def search(self, query: str, limit: int = 10, types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Search services, categories and staff by partial or misspelled name"""
+        return self._current_snapshot().search(query, limit=limit, types=types)
+    
+    def get_service_categories(self) -> Dict[str, Any]:
+        """Get all available service categories"""
+        return self._current_snapshot().get_service_categories()
+    
+    def get_services_by_category(self, service_category: str) -> Dict[str, Any]:
+        """Get all services within a specific category"""
+        return self._current_snapshot().get_services_by_category(service_category)
+    
     def get_addons_by_service(self, service_name: str) -> Dict[str, Any]:
         """Get available add-ons for a specific service"""
-        if not self.startup_data:
-            raise Exception("Services data not loaded")
-        
-        services = self.startup_data['servicesInfo']['servicesById']
-        
-        # Find service ID by name
-        selected_service_id = None
-        for service_id, service_info in services.items():
-            if service_info['name'].lower() == service_name.lower():
-                selected_service_id = service_id
-                break
-        
-        if not selected_service_id:
-            raise ValueError(f"Service '{service_name}' not found")
-        
-        # Get option group IDs for this service
-        option_group_ids = self.startup_data['servicesInfo'].get(
-            'serviceOptionGroupIdsByServiceId', {}
-        ).get(selected_service_id, [])
-        
-        if not option_group_ids:
-            return {
-                "service": service_name,
-                "service_id": int(selected_service_id),
-                "total_groups": 0,
-                "addon_groups": []
-            }
-        
-        option_groups = self.startup_data['servicesInfo']['serviceOptionGroupsById']
-        service_options = self.startup_data['servicesInfo']['serviceOptionsById']
-        
-        addon_groups = []
-        for group_id in option_group_ids:
-            group = option_groups[str(group_id)]
-            
-            # Find options in this group
-            group_options = []
-            for opt_id, option in service_options.items():
-                if option['serviceOptionGroupId'] == group_id:
-                    group_options.append({
-                        "id": int(opt_id),
-                        "name": option['name'],
-                        "price": option['price']
-                    })
-            
-            addon_groups.append({
-                "group_id": group_id,
-                "group_name": group['name'],
-                "prompt": group['prompt'],
-                "options": group_options
-            })
-        
-        return {
-            "service": service_name,
-            "service_id": int(selected_service_id),
-            "total_groups": len(option_group_ids),
-            "addon_groups": addon_groups
-        }
+        return self._current_snapshot().get_addons_by_service(service_name)
     
     def get_staff_by_service(self, service_name: str) -> Dict[str, Any]:
         """Get available staff for a specific service"""
-        if not self.startup_data:
-            raise Exception("Services data not loaded")
-        
-        services = self.startup_data['servicesInfo']['servicesById']
-        staff_by_id = self.startup_data['staffInfo']['staffById']
-        staff_ids_by_service = self.startup_data['staffInfo']['staffIdsByServiceId']
-        
-        # Find service ID by name
-        selected_service_id = None
-        for service_id, service_info in services.items():
-            if service_info['name'].lower() == service_name.lower():
-                selected_service_id = service_id
-                break
-        
-        if not selected_service_id:
-            raise ValueError(f"Service '{service_name}' not found")
-        
-        # Get available staff for this service
-        if selected_service_id not in staff_ids_by_service:
-            return {
-                "service": service_name,
-                "service_id": int(selected_service_id),
-                "total": 0,
-                "staff": []
-            }
-        
-        available_staff_ids = staff_ids_by_service[selected_service_id]
-        
-        staff_list = []
-        for staff_id in available_staff_ids:
-            staff = staff_by_id[str(staff_id)]
-            full_name = staff['firstName']
-            if staff.get('lastName'):
-                full_name += f" {staff['lastName']}"
-            
-            staff_list.append({
-                "id": staff_id,
-                "name": full_name,
-                "first_name": staff['firstName'],
-                "last_name": staff.get('lastName')
-            })
-        
-        return {
-            "service": service_name,
-            "service_id": int(selected_service_id),
-            "total": len(available_staff_ids),
-            "staff": staff_list
-        }
+        return self._current_snapshot().get_staff_by_service(service_name)
+    
+    def get_service_details_batch(self, services: List[Union[int, str]]) -> Dict[str, Any]:
+        """Get staff and add-on groups for many services, given by ID or name"""
+        return self._current_snapshot().get_service_details_batch(services)
+    
+    def get_service_pricing(self, service: Union[int, str]) -> Dict[str, Any]:
+        """Get the effective price and duration of a service for each staff member who performs it"""
+        return self._current_snapshot().get_service_pricing(service)
+    
+    def get_staff_service_pricing(self, service: Union[int, str], staff_id: int) -> Dict[str, Any]:
+        """Get the effective price and duration of a service with one staff member"""
+        return self._current_snapshot().get_staff_service_pricing(service, staff_id)
+    
+    def get_price_matrix(self, service_category: str) -> Dict[str, Any]:
+        """Get the effective price and duration of every (service, staff) pair in a category"""
+        return self._current_snapshot().get_price_matrix(service_category)
     
     def get_all_data(self) -> Dict[str, Any]:
         """Get all data in a structured format: categories -> services -> (staff + addons)"""
-        if not self.startup_data:
-            raise Exception("Services data not loaded")
-        
-        categories = self.startup_data['servicesInfo']['serviceCategories']
-        services = self.startup_data['servicesInfo']['servicesById']
-        staff_by_id = self.startup_data['staffInfo']['staffById']
-        staff_ids_by_service = self.startup_data['staffInfo']['staffIdsByServiceId']
-        option_groups = self.startup_data['servicesInfo'].get('serviceOptionGroupsById', {})
-        service_options = self.startup_data['servicesInfo'].get('serviceOptionsById', {})
-        service_option_groups = self.startup_data['servicesInfo'].get('serviceOptionGroupIdsByServiceId', {})
-        
-        result_categories = []
-        
-        for category in categories:
-            category_data = {
-                "id": category['id'],
-                "name": category['name'],
-                "services": []
-            }
-            
-            # Get all services for this category
-            for service_id, service_info in services.items():
-                if service_info['serviceCategoryId'] == category['id']:
-                    
-                    # Get staff for this service
-                    service_staff = []
-                    if service_id in staff_ids_by_service:
-                        for staff_id in staff_ids_by_service[service_id]:
-                            staff = staff_by_id[str(staff_id)]
-                            full_name = staff['firstName']
-                            if staff.get('lastName'):
-                                full_name += f" {staff['lastName']}"
-                            service_staff.append({
-                                "id": staff_id,
-                                "name": full_name
-                            })
-                    
-                    # Get addons for this service
-                    service_addons = []
-                    if service_id in service_option_groups:
-                        for group_id in service_option_groups[service_id]:
-                            group = option_groups.get(str(group_id), {})
-                            group_options = []
-                            
-                            for opt_id, option in service_options.items():
-                                if option.get('serviceOptionGroupId') == group_id:
-                                    group_options.append({
-                                        "id": int(opt_id),
-                                        "name": option['name'],
-                                        "price": option['price']
-                                    })
-                            
-                            if group:
-                                service_addons.append({
-                                    "group_id": group_id,
-                                    "group_name": group.get('name', ''),
-                                    "options": group_options
-                                })
-                    
-                    category_data["services"].append({
-                        "id": int(service_id),
-                        "name": service_info['name'],
-                        "price": service_info['defaultPrice'],
-                        "duration": service_info['defaultDuration'],
-                        "description": service_info.get('description'),
-                        "staff": service_staff,
-                        "addons": service_addons
-                    })
-            
-            result_categories.append(category_data)
-        
+        return self._current_snapshot().get_all_data()
+    
+    def iter_all_data_ndjson(
+        self,
+        fields: Iterable[str] = ALL_DATA_FIELDS,
+        categories: Optional[List[str]] = None,
+        per: str = "category"
+    ) -> Iterator[bytes]:
+        """Yield the catalog tree as NDJSON lines from the current snapshot"""
+        return self._current_snapshot().iter_all_data_ndjson(fields=fields, categories=categories, per=per)
+
+
+class CatalogRegistry:
+    """Catalog services for many mangomint companies under one memory budget
+    
+    A company's service is created on first use and its snapshot loaded on
+    demand (from disk, else upstream). Loaded companies are kept in LRU
+    order with an estimated memory cost, re-measured each time they are used
+    since rendered responses accumulate; once the total exceeds the budget
+    the coldest ones are unloaded and stop refreshing, to be reloaded from
+    their on-disk snapshot the next time they are requested. Each loaded
+    company refreshes on its own schedule.
+    """
+    
+    def __init__(
+        self,
+        companies: Dict[str, Dict[str, Any]],
+        default_company_id: str,
+        memory_budget_bytes: int,
+        snapshot_dir: str,
+        http_client: Optional[UpstreamClient] = None
+    ):
+        self.companies = companies
+        self.default_company_id = default_company_id
+        self.memory_budget_bytes = memory_budget_bytes
+        self.snapshot_dir = Path(snapshot_dir)
+        self.http_client = http_client or mangomint_client
+        self.background_refresh = False
+        self._services: Dict[str, CityGlowService] = {}
+        # Loaded companies, least recently used first, with their estimated memory
+        self._resident: "OrderedDict[str, int]" = OrderedDict()
+    
+    def __contains__(self, company_id: str) -> bool:
+        return company_id in self.companies
+    
+    def get(self, company_id: str) -> CityGlowService:
+        """Get a company's catalog service; raises KeyError for unconfigured companies"""
+        service = self._services.get(company_id)
+        if service is None:
+            config = self.companies[company_id]
+            snapshot_path = config.get("snapshot_path")
+            if snapshot_path is None and company_id != self.default_company_id:
+                snapshot_path = str(self.snapshot_dir / f"{company_id}.json")
+            service = self._services[company_id] = CityGlowService(
+                snapshot_path=snapshot_path,
+                http_client=self.http_client,
+                company_id=company_id,
+                refresh_interval=config.get("refresh_interval"),
+                on_publish=self._on_publish
+            )
+        if company_id in self._resident:
+            self._resident.move_to_end(company_id)
+            # Rendered responses accumulate between publishes, so re-measure on use
+            self._measure(service)
+        return service
+    
+    def _measure(self, service: CityGlowService):
+        snapshot = service._snapshot
+        if snapshot is None:
+            return
+        self._resident[service.company_id] = snapshot.memory_estimate
+        self._enforce_budget(keep=service.company_id)
+    
+    def _on_publish(self, service: CityGlowService):
+        snapshot = service._snapshot
+        if snapshot is None:
+            return
+        self._resident[service.company_id] = snapshot.memory_estimate
+        self._resident.move_to_end(service.company_id)
+        if self.background_refresh:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                service.start_background_refresh()
+        self._enforce_budget(keep=service.company_id)
+    
+    def _enforce_budget(self, keep: str):
+        """Unload least recently used companies until the estimate fits the budget"""
+        for company_id in list(self._resident):
+            if sum(self._resident.values()) <= self.memory_budget_bytes:
+                break
+            if company_id == keep:
+                continue
+            del self._resident[company_id]
+            self._services[company_id].unload()
+            logger.info("Unloaded catalog for company %s to stay within the memory budget", company_id)
+    
+    def start_background_refresh(self):
+        """Refresh every loaded company (and the default one) on its own schedule"""
+        self.background_refresh = True
+        self.get(self.default_company_id).start_background_refresh()
+        for company_id in list(self._resident):
+            self._services[company_id].start_background_refresh()
+    
+    async def stop_background_refresh(self):
+        self.background_refresh = False
+        await asyncio.gather(*(service.stop_background_refresh() for service in list(self._services.values())))
+    
+    def get_status(self) -> Dict[str, Any]:
+        for company_id in self._resident:
+            snapshot = self._services[company_id]._snapshot
+            if snapshot is not None:
+                self._resident[company_id] = snapshot.memory_estimate
         return {
-            "total_categories": len(categories),
-            "categories": result_categories
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "memory_estimate_bytes": sum(self._resident.values()),
+            "configured_companies": len(self.companies),
+            "loaded_companies": list(self._resident)
         }
 
-# Global instance
-cityglow_service = CityGlowService() 
\ No newline at end of file
+
+# Global instances
+catalogs = CatalogRegistry(
+    {settings.MANGOMINT_COMPANY_ID: {}, **settings.MANGOMINT_COMPANIES},
+    default_company_id=settings.MANGOMINT_COMPANY_ID,
+    memory_budget_bytes=int(settings.MANGOMINT_MEMORY_BUDGET_MB * 1024 * 1024),
+    snapshot_dir=settings.MANGOMINT_SNAPSHOT_DIR
+)
+cityglow_service = catalogs.get(settings.MANGOMINT_COMPANY_ID) 
\ No newline at end of file
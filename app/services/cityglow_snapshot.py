@@ -0,0 +1,579 @@
+import json
+import time
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Any, Optional, Sequence, Tuple, Union
+from app.services.cityglow_catalog import Catalog, Category, Service, StaffOffering
+from app.services.cityglow_search import SearchIndex
+from app.utils import fast_json
+from app.utils.compression import COMPRESSORS, MIN_COMPRESS_SIZE, compress
+
+# Optional per-service fields of the get_all tree
+ALL_DATA_FIELDS = frozenset({"description", "staff", "addons"})
+
+# Bounds on memoized responses per snapshot (compressed variants included);
+# the least recently used ones are dropped beyond them
+MAX_CACHED_RESPONSES = 512
+MAX_CACHED_RESPONSE_BYTES = 8 * 1024 * 1024
+
+# Rough ratio of the compact catalog plus its search and name indexes to the
+# size of its canonical JSON dump, used for memory budgeting
+PARSED_SIZE_FACTOR = 24
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of a content coding of a response (None for identity)"""
+    # Each coding is a distinct representation and needs its own strong ETag
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+class RenderedResponse:
+    """A JSON response body rendered once, with compressed variants built on first use
+    
+    Variants built on demand use fast compression levels; precompress()
+    builds them at maximum compression ahead of time.
+    """
+    
+    __slots__ = ("body", "etag", "_variants", "on_grow")
+    
+    def __init__(self, body: bytes, etag: str, on_grow: Optional[Callable[["RenderedResponse", int], None]] = None):
+        self.body = body
+        self.etag = etag
+        self._variants: Dict[str, Tuple[bytes, str]] = {}
+        # Told how many bytes each new variant adds, for cache accounting
+        self.on_grow = on_grow
+    
+    def variant(self, encoding: Optional[str], fast: bool = True) -> Tuple[bytes, str]:
+        """Get the body and ETag for a content coding (None for identity)"""
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, self.etag
+        
+        cached = self._variants.get(encoding)
+        if cached is None:
+            cached = (compress(self.body, encoding, fast=fast), variant_etag(self.etag, encoding))
+            self._variants[encoding] = cached
+            if self.on_grow is not None:
+                self.on_grow(self, len(cached[0]))
+        return cached
+    
+    def precompress(self):
+        for encoding in COMPRESSORS:
+            self.variant(encoding, fast=False)
+    
+    @property
+    def size_bytes(self) -> int:
+        return len(self.body) + sum(len(body) for body, _ in self._variants.values())
+
+
+class CatalogSnapshot:
+    """Immutable view of one version of the City Glow Florida startup data
+    
+    A snapshot is built in full (indexes and data version included) before it
+    is published, and is never mutated afterwards apart from memoizing
+    rendered responses. Readers hold a reference to a single snapshot for the
+    duration of a request, so swapping in a newer one never exposes a
+    half-updated catalog. The raw payload is parsed once into a compact
+    Catalog and not kept.
+    """
+    
+    def __init__(
+        self,
+        startup_data: Dict[str, Any],
+        fetched_at: Optional[float] = None,
+        previous_search_index: Optional[SearchIndex] = None
+    ):
+        self.catalog = Catalog.from_startup_data(startup_data)
+        self.fetched_at: float = fetched_at if fetched_at is not None else time.time()
+        self._build_indexes()
+        self.search_index = SearchIndex(self._search_items(), previous=previous_search_index)
+        
+        # Versioned by what is served, so upstream changes to dropped fields keep ETags valid
+        canonical = json.dumps(self.catalog.canonical(), separators=(",", ":"))
+        self.data_version: str = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        self.payload_size = len(canonical)
+        self._response_cache: "OrderedDict[str, RenderedResponse]" = OrderedDict()
+        self._cached_bytes = 0
+    
+    def _build_indexes(self):
+        """Build name lookup indexes over the catalog"""
+        self._category_by_id: Dict[int, Category] = {
+            category.id: category for category in self.catalog.categories
+        }
+        
+        self._category_id_by_name: Dict[str, int] = {}
+        for category in self.catalog.categories:
+            # Keep the first match, same as the previous linear scan
+            self._category_id_by_name.setdefault(category.name.lower(), category.id)
+        
+        self._service_id_by_name: Dict[str, int] = {}
+        for service in self.catalog.services.values():
+            self._service_id_by_name.setdefault(service.name.lower(), service.id)
+    
+    def _search_items(self) -> Iterator[Tuple[str, int, str, Dict[str, Any]]]:
+        """Yield (type, id, name, extra fields) for everything the search endpoint covers"""
+        for category in self.catalog.categories:
+            yield "category", category.id, category.name, {}
+        for service in self.catalog.services.values():
+            yield "service", service.id, service.name, {"category_id": service.category_id}
+        for staff in self.catalog.staff.values():
+            yield "staff", staff.id, staff.name, {}
+    
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+    
+    @property
+    def memory_estimate(self) -> int:
+        """Approximate bytes held by this snapshot: parsed catalog, indexes and rendered responses"""
+        return self.payload_size * PARSED_SIZE_FACTOR + self._cached_bytes
+    
+    @property
+    def categories_count(self) -> int:
+        return len(self.catalog.categories)
+    
+    @property
+    def services_count(self) -> int:
+        return len(self.catalog.services)
+    
+    def response_etag(self, key: str, encoding: Optional[str] = None) -> str:
+        """ETag of a content coding of a response (None for identity), known without rendering it"""
+        etag = '"' + hashlib.sha256(f"{self.data_version}:{key}".encode("utf-8")).hexdigest()[:32] + '"'
+        return variant_etag(etag, encoding)
+    
+    def get_cached_response(
+        self,
+        key: str,
+        builder: Callable[["CatalogSnapshot"], Dict[str, Any]]
+    ) -> RenderedResponse:
+        """Get a response rendered once for this snapshot, with its ETag"""
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+            return cached
+        
+        body = json.dumps(builder(self), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cached = RenderedResponse(body, self.response_etag(key))
+        if len(body) <= MAX_CACHED_RESPONSE_BYTES:
+            cached.on_grow = self._on_response_grow
+            self._response_cache[key] = cached
+            self._cached_bytes += len(body)
+            self._evict_responses()
+        return cached
+    
+    def _on_response_grow(self, response: RenderedResponse, added: int):
+        # Eviction detaches this callback, so only cached responses get here
+        self._cached_bytes += added
+        self._evict_responses()
+    
+    def _evict_responses(self):
+        while self._response_cache and (
+            len(self._response_cache) > MAX_CACHED_RESPONSES
+            or self._cached_bytes > MAX_CACHED_RESPONSE_BYTES
+        ):
+            _, evicted = self._response_cache.popitem(last=False)
+            evicted.on_grow = None
+            self._cached_bytes -= evicted.size_bytes
+    
+    def prerender(self):
+        """Render and compress the parameterless catalog responses ahead of the first request"""
+        self.get_cached_response("service_categories", CatalogSnapshot.get_service_categories).precompress()
+        self.get_cached_response("get_all", CatalogSnapshot.get_all_data).precompress()
+    
+    def _find_service(self, service_name: str) -> Service:
+        """Resolve a service name (case-insensitive) to its service"""
+        service_id = self._service_id_by_name.get(service_name.lower())
+        if service_id is None:
+            raise ValueError(f"Service '{service_name}' not found")
+        return self.catalog.services[service_id]
+    
+    def search(self, query: str, limit: int = 10, types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Search services, categories and staff by partial or misspelled name"""
+        results = self.search_index.search(query, limit=limit, types=types)
+        return {
+            "query": query,
+            "total": len(results),
+            "results": results
+        }
+    
+    def get_service_categories(self) -> Dict[str, Any]:
+        """Get all available service categories"""
+        categories = self.catalog.categories
+        
+        return {
+            "total": len(categories),
+            "categories": [
+                {
+                    "id": category.id,
+                    "name": category.name
+                }
+                for category in categories
+            ]
+        }
+    
+    def get_services_by_category(self, service_category: str) -> Dict[str, Any]:
+        """Get all services within a specific category"""
+        services = self.catalog.services
+        
+        category_id = self._category_id_by_name.get(service_category.lower())
+        if category_id is None:
+            raise ValueError(f"Service category '{service_category}' not found")
+        
+        service_ids = self._category_by_id[category_id].service_ids
+        
+        return {
+            "category": service_category,
+            "category_id": category_id,
+            "total": len(service_ids),
+            "services": [
+                {
+                    "id": service_id,
+                    "name": services[service_id].name,
+                    "price": services[service_id].price,
+                    "duration": services[service_id].duration,
+                    "description": services[service_id].description
+                }
+                for service_id in service_ids
+            ]
+        }
+    
+    def _resolve_service(self, service: Union[int, str]) -> Optional[Service]:
+        """Resolve a service ID or name (case-insensitive) to its service"""
+        services = self.catalog.services
+        if isinstance(service, int) or service.isdecimal():
+            if int(service) in services:
+                return services[int(service)]
+            if isinstance(service, int):
+                return None
+        service_id = self._service_id_by_name.get(service.lower())
+        return services[service_id] if service_id is not None else None
+    
+    def _addon_groups_for_service(self, service: Service) -> List[Dict[str, Any]]:
+        """Build the add-on groups offered with a service"""
+        option_groups = self.catalog.option_groups
+        
+        addon_groups = []
+        for group_id in service.option_group_ids:
+            group = option_groups[group_id]
+            addon_groups.append({
+                "group_id": group_id,
+                "group_name": group.name,
+                "prompt": group.prompt,
+                "options": [option.to_dict() for option in group.options]
+            })
+        return addon_groups
+    
+    def _staff_for_service(self, service: Service) -> List[Dict[str, Any]]:
+        """Build the list of staff who perform a service"""
+        staff_by_id = self.catalog.staff
+        
+        staff_list = []
+        for offering in service.offerings:
+            staff = staff_by_id[offering.staff_id]
+            staff_list.append({
+                "id": staff.id,
+                "name": staff.name,
+                "first_name": staff.first_name,
+                "last_name": staff.last_name
+            })
+        return staff_list
+    
+    def get_addons_by_service(self, service_name: str) -> Dict[str, Any]:
+        """Get available add-ons for a specific service"""
+        service = self._find_service(service_name)
+        addon_groups = self._addon_groups_for_service(service)
+        
+        return {
+            "service": service_name,
+            "service_id": service.id,
+            "total_groups": len(addon_groups),
+            "addon_groups": addon_groups
+        }
+    
+    def get_staff_by_service(self, service_name: str) -> Dict[str, Any]:
+        """Get available staff for a specific service"""
+        service = self._find_service(service_name)
+        staff_list = self._staff_for_service(service)
+        
+        return {
+            "service": service_name,
+            "service_id": service.id,
+            "total": len(staff_list),
+            "staff": staff_list
+        }
+    
+    def get_service_details_batch(self, services: List[Union[int, str]]) -> Dict[str, Any]:
+        """Get staff and add-on groups for many services, given by ID or name"""
+        results = []
+        not_found = []
+        for query in services:
+            service = self._resolve_service(query)
+            if service is None:
+                not_found.append(query)
+                continue
+            
+            staff_list = self._staff_for_service(service)
+            addon_groups = self._addon_groups_for_service(service)
+            results.append({
+                "query": query,
+                "service_id": service.id,
+                "service": service.name,
+                "total_staff": len(staff_list),
+                "staff": staff_list,
+                "total_groups": len(addon_groups),
+                "addon_groups": addon_groups
+            })
+        
+        return {
+            "total": len(results),
+            "services": results,
+            "not_found": not_found
+        }
+    
+    @staticmethod
+    def _days_worked_data(days_worked: Tuple[Tuple[int, int], ...]) -> List[Dict[str, int]]:
+        return [
+            {"begin_day_of_week": begin, "end_day_of_week_inclusive": end}
+            for begin, end in days_worked
+        ]
+    
+    def _offering_data(self, offering: StaffOffering) -> Dict[str, Any]:
+        """Build a staff member's effective price and duration for a service"""
+        staff = self.catalog.staff[offering.staff_id]
+        return {
+            "staff_id": staff.id,
+            "staff_name": staff.name,
+            "price": offering.price,
+            "duration": offering.duration,
+            "custom_price": offering.custom_price,
+            "custom_duration": offering.custom_duration,
+            "days_worked": self._days_worked_data(staff.days_worked)
+        }
+    
+    def _require_service(self, service: Union[int, str]) -> Service:
+        """Resolve a service ID or name, raising ValueError when it doesn't exist"""
+        resolved = self._resolve_service(service)
+        if resolved is None:
+            raise ValueError(f"Service '{service}' not found")
+        return resolved
+    
+    def get_service_pricing(self, service: Union[int, str]) -> Dict[str, Any]:
+        """Get the effective price and duration of a service for each staff member who performs it"""
+        resolved = self._require_service(service)
+        offerings = [self._offering_data(offering) for offering in resolved.offerings]
+        
+        return {
+            "service": resolved.name,
+            "service_id": resolved.id,
+            "category_id": resolved.category_id,
+            "default_price": resolved.price,
+            "default_duration": resolved.duration,
+            "min_price": resolved.min_price,
+            "max_price": resolved.max_price,
+            "is_price_range": resolved.is_price_range,
+            "days_worked": self._days_worked_data(resolved.days_worked),
+            "total": len(offerings),
+            "staff": offerings
+        }
+    
+    def get_staff_service_pricing(self, service: Union[int, str], staff_id: int) -> Dict[str, Any]:
+        """Get the effective price and duration of a service with one staff member"""
+        resolved = self._require_service(service)
+        offering = resolved.offering(staff_id)
+        if offering is None:
+            raise ValueError(f"Staff {staff_id} does not perform '{resolved.name}'")
+        
+        return {
+            "service": resolved.name,
+            "service_id": resolved.id,
+            **self._offering_data(offering)
+        }
+    
+    def get_price_matrix(self, service_category: str) -> Dict[str, Any]:
+        """Get the effective price and duration of every (service, staff) pair in a category
+        
+        `staff` lists everyone performing at least one of the category's
+        services; each service maps the IDs of the staff who perform it to
+        their price and duration.
+        """
+        category = self._select_categories([service_category])[0]
+        services = [self.catalog.services[service_id] for service_id in category.service_ids]
+        
+        staff_ids: Dict[int, None] = {}
+        for service in services:
+            for offering in service.offerings:
+                staff_ids.setdefault(offering.staff_id)
+        
+        return {
+            "category": category.name,
+            "category_id": category.id,
+            "staff": [
+                {
+                    "id": staff_id,
+                    "name": self.catalog.staff[staff_id].name
+                }
+                for staff_id in staff_ids
+            ],
+            "total_services": len(services),
+            "services": [
+                {
+                    "id": service.id,
+                    "name": service.name,
+                    "default_price": service.price,
+                    "default_duration": service.duration,
+                    "prices": {
+                        str(offering.staff_id): {
+                            "price": offering.price,
+                            "duration": offering.duration
+                        }
+                        for offering in service.offerings
+                    }
+                }
+                for service in services
+            ]
+        }
+    
+    def _build_service_data(self, service_id: int, fields: FrozenSet[str]) -> Dict[str, Any]:
+        """Build one service entry of the catalog tree, including only the requested optional fields"""
+        service = self.catalog.services[service_id]
+        service_data = {
+            "id": service.id,
+            "name": service.name,
+            "price": service.price,
+            "duration": service.duration
+        }
+        
+        if "description" in fields:
+            service_data["description"] = service.description
+        
+        if "staff" in fields:
+            staff_by_id = self.catalog.staff
+            service_data["staff"] = [
+                {
+                    "id": offering.staff_id,
+                    "name": staff_by_id[offering.staff_id].name
+                }
+                for offering in service.offerings
+            ]
+        
+        if "addons" in fields:
+            option_groups = self.catalog.option_groups
+            service_data["addons"] = [
+                {
+                    "group_id": group_id,
+                    "group_name": option_groups[group_id].name,
+                    "options": [option.to_dict() for option in option_groups[group_id].options]
+                }
+                for group_id in service.option_group_ids
+            ]
+        
+        return service_data
+    
+    def _build_category_data(self, category: Category, fields: FrozenSet[str]) -> Dict[str, Any]:
+        """Build one category of the catalog tree with its services"""
+        return {
+            "id": category.id,
+            "name": category.name,
+            "services": [
+                self._build_service_data(service_id, fields)
+                for service_id in category.service_ids
+            ]
+        }
+    
+    def _select_categories(self, categories: Optional[List[str]]) -> Sequence[Category]:
+        """Get the categories to include, in catalog order, filtered by ID or name"""
+        all_categories = self.catalog.categories
+        if not categories:
+            return all_categories
+        
+        selected_ids = set()
+        for category in categories:
+            if category.isdecimal() and int(category) in self._category_by_id:
+                selected_ids.add(int(category))
+                continue
+            category_id = self._category_id_by_name.get(category.lower())
+            if category_id is None:
+                raise ValueError(f"Service category '{category}' not found")
+            selected_ids.add(category_id)
+        return [category for category in all_categories if category.id in selected_ids]
+    
+    def iter_all_data_ndjson(
+        self,
+        fields: Iterable[str] = ALL_DATA_FIELDS,
+        categories: Optional[List[str]] = None,
+        per: str = "category"
+    ) -> Iterator[bytes]:
+        """Yield the catalog tree as NDJSON, one category (or one service) per line
+        
+        Lines are built lazily as the consumer reads them, all from this
+        snapshot, so a refresh during the stream never mixes catalog versions.
+        """
+        fields = frozenset(fields)
+        # Resolve the category filter eagerly so bad input fails before streaming starts
+        selected = self._select_categories(categories)
+        
+        def _generate() -> Iterator[bytes]:
+            for category in selected:
+                if per == "service":
+                    for service_id in category.service_ids:
+                        line = {
+                            "category_id": category.id,
+                            "category_name": category.name,
+                            **self._build_service_data(service_id, fields)
+                        }
+                        yield fast_json.dumps(line) + b"\n"
+                else:
+                    yield fast_json.dumps(self._build_category_data(category, fields)) + b"\n"
+        
+        return _generate()
+    
+    @staticmethod
+    def encode_cursor(category_id: int) -> str:
+        return base64.urlsafe_b64encode(f"c:{category_id}".encode("utf-8")).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            prefix, category_id = base64.urlsafe_b64decode(padded).decode("utf-8").split(":", 1)
+            if prefix != "c":
+                raise ValueError
+            return int(category_id)
+        except ValueError:
+            raise ValueError("Invalid cursor")
+    
+    def get_all_data(
+        self,
+        fields: Iterable[str] = ALL_DATA_FIELDS,
+        categories: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get all data in a structured format: categories -> services -> (staff + addons)
+        
+        Optional service fields outside `fields` are left out (and never built),
+        `categories` filters by category ID or name, and `limit` pages through
+        categories with `cursor` taken from the previous page's `next_cursor`.
+        """
+        fields = frozenset(fields)
+        selected = self._select_categories(categories)
+        
+        start = 0
+        if cursor is not None:
+            category_id = self.decode_cursor(cursor)
+            positions = [i for i, category in enumerate(selected) if category.id == category_id]
+            if not positions:
+                raise ValueError("Cursor category not found")
+            start = positions[0]
+        
+        end = len(selected) if limit is None else start + limit
+        result = {
+            "total_categories": len(selected),
+            "categories": [
+                self._build_category_data(category, fields)
+                for category in selected[start:end]
+            ]
+        }
+        if limit is not None:
+            result["next_cursor"] = self.encode_cursor(selected[end].id) if end < len(selected) else None
+        return result
@@ -0,0 +1,59 @@
+import gzip
+from typing import Callable, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+
+# Bodies smaller than this are always sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Supported content codings, most preferred first, at maximum compression
+# for bodies compressed ahead of time
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+# The same codings at levels cheap enough to run while a request waits
+FAST_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = lambda data: zstandard.ZstdCompressor(level=19).compress(data)
+    FAST_COMPRESSORS["zstd"] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=11)
+    FAST_COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=4)
+COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+FAST_COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def compress(data: bytes, encoding: str, fast: bool = False) -> bytes:
+    """Compress data with one of the supported content codings"""
+    return (FAST_COMPRESSORS if fast else COMPRESSORS)[encoding](data)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the preferred supported coding allowed by an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+    
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    
+    wildcard = qualities.get("*", 0.0)
+    for encoding in COMPRESSORS:
+        if qualities.get(encoding, wildcard) > 0:
+            return encoding
+    return None
@@ -0,0 +1,15 @@
+from typing import Optional
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Keep only the digits of a phone number for lookups"""
+    if not phone:
+        return None
+    return "".join(ch for ch in phone if ch.isdigit()) or None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Trim and lower-case an email address for lookups"""
+    if not email:
+        return None
+    return email.strip().lower() or None
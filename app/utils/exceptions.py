@@ -26,6 +26,21 @@ class SlotNotFoundError(HTTPException):
         super().__init__(status_code=404, detail="Slot not found")
 
 
+class SlotUnavailableError(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=409, detail="Slot is no longer available")
+
+
 class BookingNotFoundError(HTTPException):
     def __init__(self):
-        super().__init__(status_code=404, detail="Booking not found") 
\ No newline at end of file
+        super().__init__(status_code=404, detail="Booking not found")
+
+
+class UpstreamError(HTTPException):
+    def __init__(self, detail: str = "Upstream provider error"):
+        super().__init__(status_code=502, detail=detail)
+
+
+class SearchTooBroadError(HTTPException):
+    def __init__(self, detail: str = "Search is too broad for this provider"):
+        super().__init__(status_code=400, detail=detail)
@@ -0,0 +1,237 @@
+import time
+import random
+import asyncio
+import threading
+import httpx
+from typing import Any, Dict, Optional, Set
+from app.utils.rate_limit import TokenBucket
+
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the upstream is considered down and calls are short-circuited"""
+    pass
+
+
+class CircuitBreaker:
+    """Stop calling an upstream after repeated failures, probing again after a cool-down"""
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+    
+    def before_request(self):
+        """Raise CircuitOpenError unless a call may go through"""
+        with self._lock:
+            if self.state == "open":
+                raise CircuitOpenError("Upstream circuit is open")
+            if self.state == "half_open":
+                # Let a single probe through; everyone else waits out another cool-down
+                self.opened_at = time.monotonic()
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """Pooled keep-alive HTTP client (sync and async) for a single upstream API
+    
+    Connections are reused across calls and bounded by max_connections. Each
+    attempt gets its own timeout; transport errors and retryable status codes
+    are retried with jittered exponential backoff, and a circuit breaker stops
+    retry storms against an upstream that keeps failing. An optional token
+    bucket paces every attempt to stay within the upstream's quota.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        retries: int = 2,
+        backoff: float = 0.5,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retry_after: float = 30.0
+    ):
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.retries = retries
+        self.backoff = backoff
+        # Longest Retry-After worth waiting for; beyond it the response is returned as-is
+        self.max_retry_after = max_retry_after
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.rate_limiter = rate_limiter
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Tasks closing async clients of earlier event loops
+        self._closing: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+    
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    base_url=self.base_url,
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    limits=self.limits
+                )
+            return self._client
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # Async connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client is not None:
+                self._discard_async_client(self._async_client, self._async_client_loop, loop)
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def _discard_async_client(
+        self,
+        client: httpx.AsyncClient,
+        client_loop: Optional[asyncio.AbstractEventLoop],
+        loop: asyncio.AbstractEventLoop
+    ):
+        """Close an async client left behind by another event loop"""
+        if client_loop is not None and client_loop.is_running() and not client_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+            return
+        
+        async def _aclose_quietly():
+            # The old loop is gone, so its connections can only be torn down from here
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+        
+        task = loop.create_task(_aclose_quietly())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None when the upstream asks for too long a wait"""
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        # Honour the upstream's own Retry-After (in seconds) on 429/503, up to max_retry_after
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdecimal():
+            if float(retry_after) > self.max_retry_after:
+                return None
+            delay = max(delay, float(retry_after))
+        return delay
+    
+    def _is_failure(self, response: httpx.Response) -> bool:
+        return response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES
+    
+    def request(self, method: str, url: str, retry: bool = True, **kwargs: Any) -> httpx.Response:
+        """Send a request, retrying transient failures"""
+        client = self._get_client()
+        attempts = self.retries + 1 if retry else 1
+        
+        for attempt in range(attempts):
+            self.circuit_breaker.before_request()
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_blocking()
+            response = None
+            try:
+                response = client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                self.circuit_breaker.record_failure()
+                if attempt == attempts - 1:
+                    raise
+            else:
+                if not self._is_failure(response):
+                    self.circuit_breaker.record_success()
+                    return response
+                self.circuit_breaker.record_failure()
+                if attempt == attempts - 1 or response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+            delay = self._retry_delay(attempt, response)
+            if delay is None:
+                return response
+            time.sleep(delay)
+    
+    async def arequest(self, method: str, url: str, retry: bool = True, **kwargs: Any) -> httpx.Response:
+        """Send a request without blocking the event loop, retrying transient failures"""
+        client = self._get_async_client()
+        attempts = self.retries + 1 if retry else 1
+        
+        for attempt in range(attempts):
+            self.circuit_breaker.before_request()
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            response = None
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                self.circuit_breaker.record_failure()
+                if attempt == attempts - 1:
+                    raise
+            else:
+                if not self._is_failure(response):
+                    self.circuit_breaker.record_success()
+                    return response
+                self.circuit_breaker.record_failure()
+                if attempt == attempts - 1 or response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+            delay = self._retry_delay(attempt, response)
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+    
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+    
+    async def aclose(self):
+        self.close()
+        client, self._async_client = self._async_client, None
+        client_loop, self._async_client_loop = self._async_client_loop, None
+        if client is None:
+            return
+        loop = asyncio.get_running_loop()
+        if client_loop is loop:
+            await client.aclose()
+        else:
+            self._discard_async_client(client, client_loop, loop)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
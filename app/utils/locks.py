@@ -0,0 +1,32 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, List
+
+
+class KeyedLocks:
+    """One asyncio lock per key, created on demand and dropped once nobody holds or awaits it
+
+    Callers contending for the same key are serialized while different keys
+    proceed in parallel, and memory stays proportional to the keys in use.
+    """
+    
+    def __init__(self):
+        # key -> [lock, number of holders and waiters]
+        self._locks: Dict[Hashable, List] = {}
+    
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+    
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -0,0 +1,63 @@
+import time
+import asyncio
+import threading
+from typing import Optional
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token would not be available within the bucket's maximum wait"""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by every caller of an upstream
+    
+    Tokens refill continuously at `rate` per second up to `capacity`, which
+    allows short bursts while holding the long-run rate. Callers reserve
+    their token up front and then sleep off any deficit, so waiters are
+    served in arrival order instead of racing each other for refills. The
+    deficit is capped at `max_wait` seconds: callers beyond it are turned
+    away with RateLimitExceeded instead of queueing, and async callers that
+    are cancelled while waiting give their tokens back.
+    """
+    
+    def __init__(self, rate: float, capacity: float, max_wait: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self, tokens: float) -> float:
+        """Take `tokens` (possibly going into debt) and get how long to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            remaining = self._tokens - tokens
+            if remaining >= 0:
+                self._tokens = remaining
+                return 0.0
+            delay = -remaining / self.rate
+            if self.max_wait is not None and delay > self.max_wait:
+                raise RateLimitExceeded(f"Rate limit wait of {delay:.1f}s exceeds {self.max_wait:.1f}s")
+            self._tokens = remaining
+            return delay
+    
+    def _refund(self, tokens: float):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+    
+    async def acquire(self, tokens: float = 1.0):
+        delay = self._reserve(tokens)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._refund(tokens)
+                raise
+    
+    def acquire_blocking(self, tokens: float = 1.0):
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
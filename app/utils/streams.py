@@ -0,0 +1,40 @@
+import codecs
+import csv
+from typing import AsyncIterator, List
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    """Decode a byte stream into lines (without line endings) as chunks arrive"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.removesuffix("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+    """Parse CSV records from a line stream, one record at a time
+
+    A quoted field may span several lines; a record is complete once it
+    holds an even number of quote characters, since escaped quotes are doubled.
+    """
+    record_lines: List[str] = []
+    quotes = 0
+    async for line in lines:
+        record_lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        record = "\n".join(record_lines)
+        record_lines = []
+        quotes = 0
+        if record.strip():
+            yield next(csv.reader([record]))
+    if record_lines:
+        yield next(csv.reader(["\n".join(record_lines)]))
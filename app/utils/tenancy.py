@@ -0,0 +1,22 @@
+import re
+from typing import Any, Callable, Dict
+
+# /tenants/<tenant_id>/api/v1/... is served as /api/v1/... for that tenant
+TENANT_PATH = re.compile(r"^/tenants/(?P<tenant_id>[A-Za-z0-9_-]+)(?P<path>/.*)$")
+
+
+class TenantPathMiddleware:
+    """Strip a /tenants/<tenant_id> path prefix and record the tenant on request.state"""
+    
+    def __init__(self, app: Callable):
+        self.app = app
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] in ("http", "websocket"):
+            match = TENANT_PATH.match(scope["path"])
+            if match:
+                scope = dict(scope)
+                scope["path"] = match.group("path")
+                scope["raw_path"] = match.group("path").encode("utf-8")
+                scope["state"] = {**scope.get("state", {}), "tenant_id": match.group("tenant_id")}
+        await self.app(scope, receive, send)